@@ -3,13 +3,23 @@ routes/ceo.py - FINAL FIXED VERSION - NO MORE FALLBACK
 CEO Strategic Agent with proper prompt formatting
 """
 import os
-import json
+import re
+import copy
+import asyncio
+import httpx
+import orjson
+import hashlib
 import logging
-from typing import Dict, Any, List
+import jsonpatch
+from collections import OrderedDict
+from typing import Dict, Any, List, AsyncIterator
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
+from Backend.agents.customer import extract_requirements_from_text
+
 # ========================
 # LOGGING SETUP
 # ========================
@@ -30,24 +40,47 @@ load_dotenv()
 from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
-from pydantic import BaseModel as PydanticBaseModel, Field
+from langchain_core.runnables import RunnableLambda
+from langchain_core.utils.json import parse_json_markdown
+from pydantic import BaseModel as PydanticBaseModel, Field, TypeAdapter, ValidationError
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 MODEL = "llama-3.3-70b-versatile"
+# Insights extraction is a short classification-style task; override with a smaller model (e.g. llama-3.1-8b-instant) if desired
+INSIGHTS_MODEL = os.getenv("GROQ_INSIGHTS_MODEL", MODEL)
 
 if not GROQ_API_KEY:
     logger.error("❌ GROQ_API_KEY not found in .env")
     raise RuntimeError("GROQ_API_KEY required in .env file")
 
+# One pooled HTTP/2 client for every Groq call: keep-alive skips the TLS
+# handshake and concurrent requests multiplex over a single socket
+http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+    timeout=60
+)
+
 llm = ChatGroq(
     api_key=GROQ_API_KEY,
     model_name=MODEL,
-    temperature=0.3,
+    temperature=0.2,
     max_tokens=4000,
-    timeout=60
+    timeout=60,
+    http_async_client=http_client
+)
+
+# Insights JSON is ~300 tokens - a low ceiling and temperature keep it fast and stable
+insights_llm = ChatGroq(
+    api_key=GROQ_API_KEY,
+    model_name=INSIGHTS_MODEL,
+    temperature=0.1,
+    max_tokens=512,
+    timeout=60,
+    http_async_client=http_client
 )
 
-logger.info(f"✅ LangChain ChatGroq {MODEL} initialized")
+logger.info("✅ LangChain ChatGroq %s initialized", MODEL)
 
 # ========================
 # PYDANTIC MODELS FOR API
@@ -131,29 +164,275 @@ class CEOPlan(PydanticBaseModel):
     conversation_insights: Dict[str, Any] = Field(description="Insights from conversation analysis")
     success_probability: str = Field(description="Success probability: High/Medium/Low with confidence")
 
+# ========================
+# PROMPTS & CHAINS (built once at import)
+# ========================
+INSIGHTS_SYSTEM_PROMPT = """You are a conversation analyst. Extract key insights from the customer conversation.
+
+Return VALID JSON matching this structure:
+{{
+    "customer_tone": "enthusiastic|neutral|hesitant|urgent",
+    "pain_points": ["point1", "point2"],
+    "unspoken_needs": ["need1", "need2"],
+    "urgency_level": "high|medium|low",
+    "budget_flexibility": "fixed|flexible|unknown",
+    "market_context": "brief market observation",
+    "recommendations": ["rec1", "rec2"]
+}}"""
+
+INSIGHTS_USER_PROMPT = """Analyze this customer conversation and extract insights:
+
+{conversation_text}
+
+Return only valid JSON matching the schema above."""
+
+CEO_TEMPLATE_STR = """You are the CEO strategic planning agent for Automate.io. Turn the customer requirements and conversation insights into a strategic marketing plan.
+
+RULES:
+1. budget_allocation.total = {total_budget}; all amounts in INR (₹)
+2. timeline_days = sum of phase durations
+3. 3-5 phases; every list has at least 2 items
+4. Booleans are lowercase true/false
+5. Output valid JSON only - no markdown, no explanations
+
+BUDGET GUIDE: rnd_research {rnd_budget}, content_creation {content_budget}, ads_paid {ads_budget}, tools_tech {tools_budget}; leads {leads_target}; cac_target ₹{cac_target}
+
+REQUIREMENTS:
+{requirements_json}
+
+CONVERSATION INSIGHTS:
+{insights_json}
+
+Return one JSON object with exactly these keys:
+project_name, strategy_summary, executive_summary: str
+phases: [{{name, duration_days: int, deliverables: [str], owner: R&D|Marketing|CEO|External, dependencies: [str], milestone: bool}}]
+budget_allocation: {{rnd_research, content_creation, ads_paid, tools_tech, total}} (numbers)
+kpi_targets: {{leads: int, conversion_rate, roi_expected, cac_target}} (strings except leads)
+channels_priority: [str]; timeline_days: int
+risk_assessment: {{high: [str], medium: [str], mitigation: str}}
+should_trigger_rnd: bool; rnd_params: {{research_topics: [str], competitor_analysis: bool, market_research: bool}}
+should_trigger_marketing: bool; marketing_params: {{campaign_type, creative_brief, ad_budget: number}}
+conversation_insights: object; success_probability: High|Medium|Low with confidence"""
+
+# JsonOutputParser is kept for streaming - diff=True yields JSON-patch deltas, so each
+# frame carries only what the latest chunk added instead of the whole partial plan.
+# Blocking calls validate through a shared TypeAdapter. The key list above replaces its
+# format instructions, whose full JSON schema of CEOPlan was several times longer than the prompt.
+CEO_STREAM_PARSER = JsonOutputParser(pydantic_object=CEOPlan, diff=True)
+
+CEO_ADAPTER = TypeAdapter(CEOPlan)
+INSIGHTS_ADAPTER = TypeAdapter(ConversationInsights)
+
+def _validating_parser(adapter: TypeAdapter) -> RunnableLambda:
+    """LLM message -> validated dict (same lenient parsing as JsonOutputParser + pydantic-core validation)"""
+    def parse(message) -> Dict[str, Any]:
+        # Finds a ```json block anywhere in the reply and repairs output truncated at max_tokens
+        raw = parse_json_markdown(message.content)
+        if not isinstance(raw, dict):
+            return {}
+        try:
+            return adapter.validate_python(raw).model_dump()
+        except ValidationError:
+            # Incomplete output - let the caller's fix-up/fallback fill the gaps
+            return raw
+
+    async def aparse(message) -> Dict[str, Any]:
+        return parse(message)
+
+    return RunnableLambda(parse, afunc=aparse)
+
+CEO_PROMPT = ChatPromptTemplate.from_template(CEO_TEMPLATE_STR)
+INSIGHTS_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", INSIGHTS_SYSTEM_PROMPT),
+    ("user", INSIGHTS_USER_PROMPT),
+])
+
+CEO_CHAIN = CEO_PROMPT | llm | _validating_parser(CEO_ADAPTER)
+CEO_STREAM_CHAIN = CEO_PROMPT | llm | CEO_STREAM_PARSER
+INSIGHTS_CHAIN = INSIGHTS_PROMPT | insights_llm | _validating_parser(INSIGHTS_ADAPTER)
+
 # ========================
 # HELPER FUNCTIONS
 # ========================
+# The plural "s" belongs to the unit - a bare "5s" is not a budget
+_BUDGET_RE = re.compile(r"^\s*₹?\s*([\d,.]+)\s*(?:(lakh|lkh|crore|cr)s?)?\s*$", re.IGNORECASE)
+_BUDGET_MULT = {"": 1.0, "lakh": 1e5, "lkh": 1e5, "crore": 1e7, "cr": 1e7}
+
 def safe_float(value, default=100000):
-    """Safely convert value to float with default"""
-    if value is None:
-        return float(default)
+    """Safely convert value to float with default (handles "1.5 lakh", "1,50,000", "2 cr")"""
     if isinstance(value, (int, float)):
         return float(value)
-    if isinstance(value, str):
-        try:
-            value = value.strip().lower()
-            if "lkh" in value or "lakh" in value:
-                num = float(value.replace("lkh", "").replace("lakh", "").strip())
-                return num * 100000
-            elif "cr" in value or "crore" in value:
-                num = float(value.replace("cr", "").replace("crore", "").strip())
-                return num * 10000000
-            else:
-                return float(value)
-        except:
-            return float(default)
-    return float(default)
+    m = _BUDGET_RE.match(value) if isinstance(value, str) else None
+    if not m:
+        return float(default)
+    try:
+        num = float(m.group(1).replace(",", ""))
+    except ValueError:
+        return float(default)
+    return num * _BUDGET_MULT[(m.group(2) or "").lower()]
+
+# ========================
+# INSIGHTS CACHE
+# ========================
+INSIGHTS_CACHE_SIZE = 512
+NEAR_MISS_MAX_CHARS = 200
+_insights_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+def _messages_key(messages: List[Dict[str, str]]) -> str:
+    """Stable hash of a message list"""
+    payload = orjson.dumps(messages, option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def _cache_get(key: str):
+    insights = _insights_cache.get(key)
+    if insights is not None:
+        _insights_cache.move_to_end(key)
+    return insights
+
+def _cache_put(key: str, insights: Dict[str, Any]):
+    _insights_cache[key] = insights
+    _insights_cache.move_to_end(key)
+    if len(_insights_cache) > INSIGHTS_CACHE_SIZE:
+        _insights_cache.popitem(last=False)
+
+# ========================
+# TRIVIAL CONVERSATION HEURISTICS
+# ========================
+TRIVIAL_MIN_MESSAGES = 3
+TRIVIAL_MIN_CHARS = 200
+
+def _heuristic_insights(messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    """Cheap insights for conversations too short for the LLM to say anything useful"""
+    text = " ".join(m.get("content", "") for m in messages)
+    reqs = extract_requirements_from_text(text)
+    missing = [k.replace("_", " ") for k, v in reqs.items() if not v]
+    return {
+        "customer_tone": "neutral",
+        "pain_points": [f"Missing details: {', '.join(missing)}"] if missing else ["Limited information provided"],
+        "unspoken_needs": ["Market validation"],
+        "urgency_level": "medium",
+        "budget_flexibility": "unknown",
+        "market_context": "Short conversation - heuristic analysis",
+        "recommendations": [f"Clarify {field}" for field in missing] or ["Collect more market data"]
+    }
+
+# ========================
+# PLAN DEFAULTS
+# ========================
+_PHASES_DEFAULT = [
+    {
+        "name": "Research & Planning",
+        "duration_days": 3,
+        "deliverables": ["Strategy document"],
+        "owner": "R&D",
+        "dependencies": [],
+        "milestone": True
+    },
+    {
+        "name": "Content Creation",
+        "duration_days": 5,
+        "deliverables": ["Creative assets"],
+        "owner": "Marketing",
+        "dependencies": ["Research & Planning"],
+        "milestone": True
+    },
+    {
+        "name": "Campaign Execution",
+        "duration_days": 6,
+        "deliverables": ["Live campaign", "Performance report"],
+        "owner": "Marketing",
+        "dependencies": ["Content Creation"],
+        "milestone": True
+    }
+]
+
+_RISK_DEFAULTS = {
+    "high": ["Timeline constraints", "Budget limitations"],
+    "medium": ["Audience targeting", "Market competition"],
+    "mitigation": "Daily optimization, A/B testing, continuous monitoring"
+}
+
+_RND_DEFAULTS = {
+    "research_topics": ["Market analysis", "Competitor research"],
+    "competitor_analysis": True,
+    "market_research": True
+}
+
+_PLAN_DEFAULTS = {
+    "strategy_summary": "Multi-channel marketing campaign with data-driven approach.",
+    "timeline_days": 14,
+    "should_trigger_rnd": True,
+    "should_trigger_marketing": True,
+    "success_probability": "Medium",
+    "phases": _PHASES_DEFAULT,
+    "risk_assessment": _RISK_DEFAULTS,
+    "rnd_params": _RND_DEFAULTS
+}
+
+def _build_defaults(budget: float, requirements: Dict[str, Any]) -> Dict[str, Any]:
+    """Full defaults template for a plan, parametrized on budget + requirements"""
+    leads = max(10, int(budget / 1000))
+    channels = requirements.get("channels")
+    return {
+        **_PLAN_DEFAULTS,
+        "project_name": f"{requirements.get('product_service', 'Campaign')} Strategic Plan",
+        "executive_summary": f"Comprehensive marketing campaign for {requirements.get('product_service')} targeting {requirements.get('target_audience')}.",
+        "channels_priority": [ch.strip() for ch in channels.split(",")] if channels else ["LinkedIn", "YouTube"],
+        "budget_allocation": {
+            "rnd_research": budget * 0.15,
+            "content_creation": budget * 0.25,
+            "ads_paid": budget * 0.50,
+            "tools_tech": budget * 0.10,
+            "total": budget
+        },
+        "kpi_targets": {
+            "leads": leads,
+            "conversion_rate": "3-5%",
+            "roi_expected": "2-3x",
+            "cac_target": f"₹{int(budget / leads)}"
+        },
+        "marketing_params": {
+            "campaign_type": "Awareness + Lead Generation",
+            "creative_brief": f"Create {requirements.get('goals')} for {requirements.get('product_service')}",
+            "ad_budget": budget * 0.50
+        }
+    }
+
+def _is_empty(value) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+def _deep_merge(default: Any, actual: Any) -> Any:
+    """Overlay actual onto default: dicts merge recursively, missing/empty leaves take the default"""
+    if isinstance(default, dict):
+        if not isinstance(actual, dict):
+            actual = {}
+        merged = {**default, **actual}
+        for key, default_value in default.items():
+            merged[key] = _deep_merge(default_value, actual.get(key))
+        return merged
+    # Defaults are shared module-level objects - hand out copies so plans never alias them
+    return copy.deepcopy(default) if _is_empty(actual) else actual
+
+# ========================
+# HISTORY WINDOW
+# ========================
+_HISTORY_WINDOW = 12
+_MAX_MESSAGE_CHARS = 500
+_ROLE_LABELS = {"user": "Customer", "system": "Context"}  # anything else is the intake assistant
+
+def _windowed_transcript(messages: List[Dict[str, str]]) -> str:
+    """Last _HISTORY_WINDOW turns (each clipped) plus a one-line summary of older turns"""
+    recent = messages[-_HISTORY_WINDOW:]
+    lines = [
+        f"{_ROLE_LABELS.get(m.get('role'), 'Assistant')}: {m.get('content', '')[:_MAX_MESSAGE_CHARS]}"
+        for m in recent
+    ]
+    older = messages[:-_HISTORY_WINDOW]
+    if older:
+        older_text = " ".join(m.get("content", "") for m in older if m.get("role") == "user")
+        covered = [k.replace("_", " ") for k, v in extract_requirements_from_text(older_text).items() if v]
+        lines.insert(0, f"[Summary of {len(older)} earlier messages - customer discussed: {', '.join(covered) or 'general details'}]")
+    return "\n".join(lines)
 
 # ========================
 # CEO AGENT CLASS
@@ -162,8 +441,8 @@ class CEOAgent:
     def __init__(self):
         self.model = MODEL
 
-    def _extract_conversation_insights(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
-        """Analyze full conversation history to extract deeper insights"""
+    async def _extract_conversation_insights(self, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+        """Extract insights from the last _HISTORY_WINDOW turns (each clipped to _MAX_MESSAGE_CHARS) plus a keyword summary of older turns"""
         if not messages:
             return {
                 "customer_tone": "neutral",
@@ -175,44 +454,36 @@ class CEOAgent:
                 "recommendations": ["Collect more market data"]
             }
         
+        total_chars = sum(len(m.get("content", "")) for m in messages)
+        if len(messages) < TRIVIAL_MIN_MESSAGES or total_chars < TRIVIAL_MIN_CHARS:
+            logger.info("⏭️ Conversation insights skipped (trivial conversation)")
+            return _heuristic_insights(messages)
+        
+        key = _messages_key(messages)
+        cached = _cache_get(key)
+        if cached is None and len(messages) > 1 and len(messages[-1].get("content", "")) < NEAR_MISS_MAX_CHARS:
+            # A short final turn rarely shifts the insights - reuse the previous analysis
+            cached = _cache_get(_messages_key(messages[:-1]))
+        if cached is not None:
+            logger.info("⚡ Conversation insights served from cache")
+            return cached
+        
         logger.info("🔍 Analyzing conversation history for insights...")
         
         try:
-            conversation_text = "\n".join([
-                f"{'Customer' if m.get('role') == 'user' else 'Assistant'}: {m.get('content', '')}"
-                for m in messages
-            ])
+            conversation_text = _windowed_transcript(messages)
             
-            parser = JsonOutputParser(pydantic_object=ConversationInsights)
+            insights = await INSIGHTS_CHAIN.ainvoke({"conversation_text": conversation_text})
             
-            analysis_prompt = ChatPromptTemplate.from_messages([
-                ("system", """You are a conversation analyst. Extract key insights from the customer conversation.
-                
-Return VALID JSON matching this structure:
-{
-    "customer_tone": "enthusiastic|neutral|hesitant|urgent",
-    "pain_points": ["point1", "point2"],
-    "unspoken_needs": ["need1", "need2"],
-    "urgency_level": "high|medium|low",
-    "budget_flexibility": "fixed|flexible|unknown",
-    "market_context": "brief market observation",
-    "recommendations": ["rec1", "rec2"]
-}"""),
-                ("user", f"""Analyze this customer conversation and extract insights:
-
-{conversation_text}
-
-Return only valid JSON matching the schema above.""")
-            ])
-            
-            chain = analysis_prompt | llm | parser
-            insights = chain.invoke({})
+            if not insights:
+                raise ValueError("no JSON object in insights reply")
             
-            logger.info(f"✅ Conversation insights extracted: {insights.get('customer_tone')}")
-            return insights.dict() if hasattr(insights, 'dict') else dict(insights)
+            logger.info("✅ Conversation insights extracted: %s", insights.get('customer_tone'))
+            _cache_put(key, insights)
+            return insights
             
         except Exception as e:
-            logger.warning(f"⚠️ Conversation analysis failed: {str(e)[:100]}")
+            logger.warning("⚠️ Conversation analysis failed: %.100s", e)
             return {
                 "customer_tone": "neutral",
                 "pain_points": ["Analysis failed"],
@@ -223,267 +494,110 @@ Return only valid JSON matching the schema above.""")
                 "recommendations": ["Proceed with standard approach"]
             }
 
-    def analyze_requirements(self, requirements: Dict[str, Any], messages: List[Dict[str, str]] = None) -> Dict[str, Any]:
+    async def _build_plan_inputs(self, requirements: Dict[str, Any], messages: List[Dict[str, str]] = None):
+        """Compute budget splits + conversation insights and return (chain inputs, insights)"""
+        # Extract insights from conversation while the budget math runs
+        insights_task = asyncio.create_task(self._extract_conversation_insights(messages)) if messages else None
+        
+        budget = safe_float(requirements.get("budget"))
+        logger.info("📊 Budget parsed: ₹%.0f", budget)
+        
+        # Calculate budget splits
+        rnd_budget = int(budget * 0.15)
+        content_budget = int(budget * 0.25)
+        ads_budget = int(budget * 0.50)
+        tools_budget = int(budget * 0.10)
+        leads_target = max(10, int(budget / 1000))
+        cac_target = int(budget / max(10, int(budget / 1000)))
+        
+        insights = await insights_task if insights_task else {}
+        
+        # Prepare data - CONVERT TO STRINGS TO AVOID F-STRING ISSUES
+        req_text = orjson.dumps(requirements).decode()
+        insights_text = orjson.dumps(insights).decode() if insights else "No conversation history"
+        
+        # Template variables (NO f-strings)
+        inputs = {
+            "total_budget": int(budget),
+            "rnd_budget": rnd_budget,
+            "content_budget": content_budget,
+            "ads_budget": ads_budget,
+            "tools_budget": tools_budget,
+            "leads_target": leads_target,
+            "cac_target": cac_target,
+            "requirements_json": req_text,
+            "insights_json": insights_text
+        }
+        return inputs, insights
+
+    async def analyze_requirements(self, requirements: Dict[str, Any], messages: List[Dict[str, str]] = None) -> Dict[str, Any]:
         """Generate CEO strategic plan from requirements AND conversation history"""
         logger.info("🤖 CEO Agent analyzing requirements...")
-        logger.debug(f"Requirements: {json.dumps(requirements, ensure_ascii=False)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Requirements: %s", orjson.dumps(requirements).decode())
         
         try:
-            budget = safe_float(requirements.get("budget"))
-            logger.info(f"📊 Budget parsed: ₹{budget:,.0f}")
+            inputs, insights = await self._build_plan_inputs(requirements, messages)
             
-            # Extract insights from conversation
-            insights = {}
-            if messages:
-                insights = self._extract_conversation_insights(messages)
+            logger.info("📤 Invoking Groq %s...", MODEL)
             
-            # Prepare data - CONVERT TO STRINGS TO AVOID F-STRING ISSUES
-            req_text = json.dumps(requirements, indent=2, ensure_ascii=False)
-            insights_text = json.dumps(insights, indent=2, ensure_ascii=False) if insights else "No conversation history"
+            plan = await CEO_CHAIN.ainvoke(inputs)
             
-            # FIXED: Use proper template variables instead of f-string with JSON
-            parser = JsonOutputParser(pydantic_object=CEOPlan)
-            
-            # Build prompt WITHOUT f-strings for JSON objects
-            prompt = ChatPromptTemplate.from_template("""You are a CEO STRATEGIC PLANNING AGENT for Automate.io.
-
-Your task: Transform customer requirements AND conversation insights into a comprehensive JSON strategic marketing plan.
-
-CRITICAL CONSTRAINTS:
-1. RETURN ONLY VALID JSON matching the exact schema
-2. budget_allocation.total MUST equal {total_budget}
-3. timeline_days = sum of all phase durations
-4. phases: minimum 3, maximum 5 items
-5. All arrays must have minimum 2 items
-6. Booleans must be true/false (lowercase)
-7. All amounts in INR (₹)
-
-CUSTOMER REQUIREMENTS:
-{requirements_json}
-
-CONVERSATION INSIGHTS (use this to enhance strategy):
-{insights_json}
-
-Generate a comprehensive CEO strategic plan as valid JSON matching this exact structure:
-
-{{
-    "project_name": "specific project name",
-    "strategy_summary": "2-3 sentence high-level strategy",
-    "executive_summary": "detailed paragraph with all key points",
-    "phases": [
-        {{
-            "name": "phase name with action verb",
-            "duration_days": 3,
-            "deliverables": ["specific output 1", "specific output 2"],
-            "owner": "R&D",
-            "dependencies": [],
-            "milestone": true
-        }},
-        {{
-            "name": "second phase",
-            "duration_days": 5,
-            "deliverables": ["output 1", "output 2"],
-            "owner": "Marketing",
-            "dependencies": ["phase name"],
-            "milestone": true
-        }},
-        {{
-            "name": "third phase",
-            "duration_days": 6,
-            "deliverables": ["output 1", "output 2"],
-            "owner": "Marketing",
-            "dependencies": ["second phase"],
-            "milestone": true
-        }}
-    ],
-    "budget_allocation": {{
-        "rnd_research": {rnd_budget},
-        "content_creation": {content_budget},
-        "ads_paid": {ads_budget},
-        "tools_tech": {tools_budget},
-        "total": {total_budget}
-    }},
-    "kpi_targets": {{
-        "leads": {leads_target},
-        "conversion_rate": "3-5%",
-        "roi_expected": "2-3x",
-        "cac_target": "₹{cac_target}"
-    }},
-    "channels_priority": ["LinkedIn", "YouTube"],
-    "timeline_days": 14,
-    "risk_assessment": {{
-        "high": ["Limited budget may restrict reach", "Tight timeline requires agile execution"],
-        "medium": ["Market saturation in awareness space", "Audience targeting precision"],
-        "mitigation": "Use combination of organic and paid channels. Implement daily optimization."
-    }},
-    "should_trigger_rnd": true,
-    "rnd_params": {{
-        "research_topics": ["Audience behavior analysis", "Competitor positioning", "Market gaps"],
-        "competitor_analysis": true,
-        "market_research": true
-    }},
-    "should_trigger_marketing": true,
-    "marketing_params": {{
-        "campaign_type": "Awareness + Lead Generation",
-        "creative_brief": "Create compelling marketing content for target audience",
-        "ad_budget": {ads_budget}
-    }},
-    "conversation_insights": {insights_json},
-    "success_probability": "High"
-}}
-
-VALIDATION CHECKLIST:
-- All required keys present
-- budget_allocation.total equals {total_budget}
-- timeline_days = sum of phase durations
-- phases count minimum 3
-- Valid JSON only, no markdown
-
-Return ONLY valid JSON. NO explanations.""")
+            # Validate and fix
+            plan = self._validate_and_fix_plan(plan, requirements, insights)
             
-            # Calculate budget splits
-            rnd_budget = int(budget * 0.15)
-            content_budget = int(budget * 0.25)
-            ads_budget = int(budget * 0.50)
-            tools_budget = int(budget * 0.10)
-            leads_target = max(10, int(budget / 1000))
-            cac_target = int(budget / max(10, int(budget / 1000)))
+            logger.info("✅ CEO plan generated: %s", plan.get('project_name'))
+            return plan
             
-            # Invoke with template variables (NO f-strings)
-            chain = prompt | llm | parser
+        except Exception:
+            logger.exception("❌ LLM Error")
+            raise
+
+    async def stream_requirements(self, requirements: Dict[str, Any], messages: List[Dict[str, str]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream JSON-patch deltas of the plan ({"patch": [...]}), ending with the validated plan"""
+        logger.info("🤖 CEO Agent streaming plan...")
+        
+        try:
+            inputs, insights = await self._build_plan_inputs(requirements, messages)
             
-            logger.info(f"📤 Invoking Groq {MODEL} with JsonOutputParser...")
+            logger.info("📤 Streaming Groq %s with JsonOutputParser...", MODEL)
             
-            plan = chain.invoke({
-                "total_budget": int(budget),
-                "rnd_budget": rnd_budget,
-                "content_budget": content_budget,
-                "ads_budget": ads_budget,
-                "tools_budget": tools_budget,
-                "leads_target": leads_target,
-                "cac_target": cac_target,
-                "requirements_json": req_text,
-                "insights_json": insights_text
-            })
+            plan = None
+            async for ops in CEO_STREAM_CHAIN.astream(inputs):
+                plan = jsonpatch.apply_patch(plan, ops, in_place=True)
+                yield {"patch": ops}
             
-            if hasattr(plan, 'dict'):
-                plan = plan.dict()
-            else:
-                plan = json.loads(json.dumps(plan, default=str))
+            plan = self._validate_and_fix_plan(dict(plan or {}), requirements, insights)
             
-            # Validate and fix
-            plan = self._validate_and_fix_plan(plan, requirements, insights)
-            
-            logger.info(f"✅ CEO plan generated: {plan.get('project_name')}")
-            return plan
+            logger.info("✅ CEO plan streamed: %s", plan.get('project_name'))
+            yield {"plan": plan}
             
         except Exception as e:
             error_msg = f"{type(e).__name__}: {str(e)[:150]}"
-            logger.error(f"❌ LLM Error: {error_msg}")
-            logger.error(f"Traceback: {str(e)}")
-            raise
+            logger.exception("❌ LLM Error")
+            yield {"error": error_msg}
 
     def _validate_and_fix_plan(self, plan: Dict[str, Any], requirements: Dict[str, Any], insights: Dict[str, Any] = None) -> Dict[str, Any]:
         """Validate and auto-fix plan structure"""
         budget = safe_float(requirements.get("budget"))
         
-        if "budget_allocation" not in plan:
-            plan["budget_allocation"] = {}
+        plan = _deep_merge(_build_defaults(budget, requirements), plan)
+        
+        if not isinstance(plan["phases"], list) or len(plan["phases"]) < 3:
+            plan["phases"] = copy.deepcopy(_PHASES_DEFAULT)
         
         plan["budget_allocation"]["total"] = budget
         
         if insights:
             plan["conversation_insights"] = insights
         
-        defaults = {
-            "project_name": f"{requirements.get('product_service', 'Campaign')} Strategic Plan",
-            "strategy_summary": "Multi-channel marketing campaign with data-driven approach.",
-            "executive_summary": f"Comprehensive marketing campaign for {requirements.get('product_service')} targeting {requirements.get('target_audience')}.",
-            "channels_priority": [ch.strip() for ch in (requirements.get("channels", "").split(","))] if requirements.get("channels") else ["LinkedIn", "YouTube"],
-            "timeline_days": 14,
-            "should_trigger_rnd": True,
-            "should_trigger_marketing": True,
-            "success_probability": "Medium"
-        }
-        
-        for key, default_value in defaults.items():
-            if key not in plan or not plan[key]:
-                plan[key] = default_value
-        
-        if not isinstance(plan.get("phases"), list) or len(plan["phases"]) < 3:
-            plan["phases"] = [
-                {
-                    "name": "Research & Planning",
-                    "duration_days": 3,
-                    "deliverables": ["Strategy document"],
-                    "owner": "R&D",
-                    "dependencies": [],
-                    "milestone": True
-                },
-                {
-                    "name": "Content Creation",
-                    "duration_days": 5,
-                    "deliverables": ["Creative assets"],
-                    "owner": "Marketing",
-                    "dependencies": ["Research & Planning"],
-                    "milestone": True
-                },
-                {
-                    "name": "Campaign Execution",
-                    "duration_days": 6,
-                    "deliverables": ["Live campaign", "Performance report"],
-                    "owner": "Marketing",
-                    "dependencies": ["Content Creation"],
-                    "milestone": True
-                }
-            ]
-        
-        ba = plan.get("budget_allocation", {})
-        ba.setdefault("rnd_research", budget * 0.15)
-        ba.setdefault("content_creation", budget * 0.25)
-        ba.setdefault("ads_paid", budget * 0.50)
-        ba.setdefault("tools_tech", budget * 0.10)
-        ba["total"] = budget
-        plan["budget_allocation"] = ba
-        
-        if not isinstance(plan.get("kpi_targets"), dict):
-            plan["kpi_targets"] = {}
-        
-        kpi = plan["kpi_targets"]
-        kpi.setdefault("leads", max(10, int(budget / 1000)))
-        kpi.setdefault("conversion_rate", "3-5%")
-        kpi.setdefault("roi_expected", "2-3x")
-        kpi.setdefault("cac_target", f"₹{int(budget / max(10, int(budget / 1000)))}")
-        
-        if not isinstance(plan.get("risk_assessment"), dict):
-            plan["risk_assessment"] = {}
-        
-        ra = plan["risk_assessment"]
-        if not ra.get("high"):
-            ra["high"] = ["Timeline constraints", "Budget limitations"]
-        if not ra.get("medium"):
-            ra["medium"] = ["Audience targeting", "Market competition"]
-        ra.setdefault("mitigation", "Daily optimization, A/B testing, continuous monitoring")
-        
-        if not isinstance(plan.get("rnd_params"), dict):
-            plan["rnd_params"] = {}
-        
-        rnd = plan["rnd_params"]
-        rnd.setdefault("research_topics", ["Market analysis", "Competitor research"])
-        rnd.setdefault("competitor_analysis", True)
-        rnd.setdefault("market_research", True)
-        
-        if not isinstance(plan.get("marketing_params"), dict):
-            plan["marketing_params"] = {}
-        
-        mp = plan["marketing_params"]
-        mp.setdefault("campaign_type", "Awareness + Lead Generation")
-        mp.setdefault("creative_brief", f"Create {requirements.get('goals')} for {requirements.get('product_service')}")
-        mp.setdefault("ad_budget", budget * 0.50)
-        
-        logger.info(f"✅ Plan validated and fixed")
+        logger.info("✅ Plan validated and fixed")
         return plan
 
+async def aclose_http_client():
+    """Close the pooled Groq HTTP client (the gateway's lifespan calls this on shutdown)"""
+    await http_client.aclose()
+
 # ========================
 # FASTAPI ROUTER
 # ========================
@@ -491,16 +605,26 @@ router = APIRouter()
 agent = CEOAgent()
 
 @router.post("/api/v1/ceo/analyze")
-async def analyze_plan(request: CEOAnalysisRequest):
+async def analyze_plan(request: CEOAnalysisRequest, stream: bool = True):
     """
     Receive requirements + conversation from frontend
     Generate CEO strategic plan
+
+    Streams NDJSON frames ({"patch": [...]} deltas then {"plan": ...}) by default;
+    pass ?stream=0 for a single JSON response.
     """
     try:
-        logger.info(f"📨 CEO Analysis request: {request.conversation_id}")
-        logger.info(f"Requirements: {request.requirements}")
+        logger.info("📨 CEO Analysis request: %s", request.conversation_id)
+        logger.info("Requirements: %s", request.requirements)
+        
+        if stream:
+            async def generator():
+                async for frame in agent.stream_requirements(request.requirements, request.messages):
+                    yield orjson.dumps({"conversation_id": request.conversation_id, **frame}) + b"\n"
+            
+            return StreamingResponse(generator(), media_type="application/x-ndjson")
         
-        plan = agent.analyze_requirements(request.requirements, request.messages)
+        plan = await agent.analyze_requirements(request.requirements, request.messages)
         
         return {
             "status": "success",
@@ -509,7 +633,7 @@ async def analyze_plan(request: CEOAnalysisRequest):
         }
         
     except Exception as e:
-        logger.error(f"❌ CEO Analysis error: {str(e)}")
+        logger.error("❌ CEO Analysis error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/api/v1/ceo/status")
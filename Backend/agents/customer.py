@@ -1,8 +1,11 @@
 import os
+import re
 import uuid
+import asyncio
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 
+import orjson
 from dotenv import load_dotenv
 from langgraph.graph import MessagesState, START, END, StateGraph
 from langgraph.checkpoint.memory import MemorySaver
@@ -51,68 +54,151 @@ prompt = ChatPromptTemplate.from_messages([
     MessagesPlaceholder(variable_name="messages"),
 ])
 
+FIELD_KEYWORDS: Dict[str, List[str]] = {
+    "product_service": ["product", "service", "sell", "launch", "ashwagandha", "supplement"],
+    "target_audience": ["target", "audience", "customer", "professional", "age", "students", "parents"],
+    "budget": ["budget", "₹", "lakh", "crore", "rs", "rupee", "price", "spend"],
+    "timeline": ["week", "month", "timeline", "when", "launch", "start", "duration"],
+    "channels": ["instagram", "insta", "linkedin", "email", "youtube", "facebook", "social"],
+    "goals": ["lead", "leads", "sale", "sales", "awareness", "signup", "conversion"],
+}
+
+def _keyword_pattern(words: List[str]) -> "re.Pattern[str]":
+    # Anchor word keywords at a word start so "rs" or "age" don't fire inside
+    # unrelated words; plurals ("weeks", "months") still match. Symbols like ₹
+    # have no word boundary and are matched as-is.
+    alternatives = [
+        rf"\b{re.escape(w)}" if w[0].isalnum() else re.escape(w)
+        for w in sorted(words, key=len, reverse=True)
+    ]
+    return re.compile("|".join(alternatives), re.IGNORECASE)
+
+_FIELDS = tuple(FIELD_KEYWORDS)
+_FIELD_PATTERNS = {field: _keyword_pattern(words) for field, words in FIELD_KEYWORDS.items()}
+
+def extract_requirements_from_text(text: str) -> Dict[str, Optional[str]]:
+    return {field: ("mentioned" if p.search(text) else None) for field, p in _FIELD_PATTERNS.items()}
+
+def compute_completeness(conv: Dict[str, Any]) -> float:
+    return conv["collected_count"] / 6.0
+
 class ConversationStore:
     def __init__(self):
         self.conversations: Dict[str, Dict[str, Any]] = {}
 
-    def create(self, conv_id: str):
+    async def create(self, conv_id: str):
         self.conversations[conv_id] = {
             "messages": [],
+            "requirements": {k: None for k in _FIELDS},
+            "collected_count": 0,
             "created_at": datetime.now().isoformat(),
         }
 
-    def add_message(self, conv_id: str, role: str, text: str):
+    async def add_message(self, conv_id: str, role: str, text: str):
         if conv_id not in self.conversations:
-            self.create(conv_id)
-        self.conversations[conv_id]["messages"].append({
+            await self.create(conv_id)
+        conv = self.conversations[conv_id]
+        conv["messages"].append({
             "role": role,
             "text": text,
             "timestamp": datetime.now().isoformat(),
         })
+        # Only the new message needs scanning - flags never flip back to None
+        reqs = conv["requirements"]
+        for k, v in extract_requirements_from_text(text).items():
+            if v and not reqs[k]:
+                reqs[k] = v
+                conv["collected_count"] += 1
 
-    def get(self, conv_id: str) -> Optional[Dict[str, Any]]:
+    async def get(self, conv_id: str) -> Optional[Dict[str, Any]]:
         return self.conversations.get(conv_id)
 
-store = ConversationStore()
+    async def exists(self, conv_id: str) -> bool:
+        return conv_id in self.conversations
 
-def extract_requirements_from_text(text: str) -> Dict[str, Optional[str]]:
-    t = text.lower()
-    def present(words: List[str]) -> Optional[str]:
-        return "mentioned" if any(w in t for w in words) else None
-    
-    return {
-        "product_service": present(["product", "service", "sell", "launch", "ashwagandha", "supplement"]),
-        "target_audience": present(["target", "audience", "customer", "professional", "age", "students", "parents"]),
-        "budget": present(["budget", "₹", "lakh", "crore", "rs", "rupee", "price", "spend"]),
-        "timeline": present(["week", "month", "timeline", "when", "launch", "start", "duration"]),
-        "channels": present(["instagram", "insta", "linkedin", "email", "youtube", "facebook", "social"]),
-        "goals": present(["lead", "leads", "sale", "sales", "awareness", "signup", "conversion"]),
-    }
+    async def get_requirements(self, conv_id: str) -> Optional[Dict[str, Any]]:
+        """Requirement flags + collected_count only (no message history)"""
+        return self.conversations.get(conv_id)
+
+class RedisConversationStore:
+    """Same interface as ConversationStore, shared across workers via Redis.
+
+    conv:{id}          hash  - created_at + one req:{field} entry per mentioned field
+    conv:{id}:messages list  - JSON-encoded messages (RPUSH keeps appends atomic)
+    """
+
+    def __init__(self, url: str):
+        from redis.asyncio import Redis
+        self.redis = Redis.from_url(url)
 
-def compute_completeness(reqs: Dict[str, Optional[str]]) -> float:
-    collected = sum(1 for v in reqs.values() if v)
-    return collected / 6.0
+    async def create(self, conv_id: str):
+        await self.redis.hsetnx(f"conv:{conv_id}", "created_at", datetime.now().isoformat())
+
+    async def add_message(self, conv_id: str, role: str, text: str):
+        message = {
+            "role": role,
+            "text": text,
+            "timestamp": datetime.now().isoformat(),
+        }
+        flags = {f"req:{k}": v for k, v in extract_requirements_from_text(text).items() if v}
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hsetnx(f"conv:{conv_id}", "created_at", message["timestamp"])
+            pipe.rpush(f"conv:{conv_id}:messages", orjson.dumps(message))
+            if flags:
+                pipe.hset(f"conv:{conv_id}", mapping=flags)
+            await pipe.execute()
+
+    async def get(self, conv_id: str) -> Optional[Dict[str, Any]]:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hgetall(f"conv:{conv_id}")
+            pipe.lrange(f"conv:{conv_id}:messages", 0, -1)
+            meta, raw_messages = await pipe.execute()
+        if not meta:
+            return None
+        return {
+            "messages": [orjson.loads(m) for m in raw_messages],
+            **self._decode_meta(meta),
+        }
+
+    async def exists(self, conv_id: str) -> bool:
+        return bool(await self.redis.exists(f"conv:{conv_id}"))
+
+    async def get_requirements(self, conv_id: str) -> Optional[Dict[str, Any]]:
+        """Requirement flags + collected_count from the hash alone - O(1) in conversation length"""
+        meta = await self.redis.hgetall(f"conv:{conv_id}")
+        return self._decode_meta(meta) if meta else None
+
+    @staticmethod
+    def _decode_meta(meta: Dict[bytes, bytes]) -> Dict[str, Any]:
+        meta = {k.decode(): v.decode() for k, v in meta.items()}
+        requirements = {k: meta.get(f"req:{k}") for k in _FIELDS}
+        return {
+            "requirements": requirements,
+            "collected_count": sum(1 for v in requirements.values() if v),
+            "created_at": meta["created_at"],
+        }
+
+REDIS_URL = os.getenv("REDIS_URL")
+store = RedisConversationStore(REDIS_URL) if REDIS_URL else ConversationStore()
 
 class ConversationState(MessagesState):
     conversation_id: str
     requirements: Dict[str, Optional[str]]
     completeness: float
 
-def intake_agent(state: ConversationState) -> ConversationState:
+async def intake_agent(state: ConversationState) -> ConversationState:
     messages = state["messages"]
-    response = llm.invoke(prompt.format_messages(messages=messages))
+    response = await llm.ainvoke(prompt.format_messages(messages=messages))
     
-    store.add_message(state["conversation_id"], "assistant", response.content)
+    await store.add_message(state["conversation_id"], "assistant", response.content)
     
-    conv = store.get(state["conversation_id"])
-    all_text = " ".join(m["text"] for m in conv["messages"]) if conv else ""
-    reqs = extract_requirements_from_text(all_text)
-    completeness = compute_completeness(reqs)
-    
-    new_messages = messages + [response]
+    conv = await store.get_requirements(state["conversation_id"])
+    reqs = dict(conv["requirements"])
+    completeness = compute_completeness(conv)
     
+    # add_messages reducer appends the reply to the checkpointed history
     return {
-        "messages": new_messages,
+        "messages": [response],
         "conversation_id": state["conversation_id"],
         "requirements": reqs,
         "completeness": completeness,
@@ -123,29 +209,50 @@ builder.add_node("intake", intake_agent)
 builder.add_edge(START, "intake")
 builder.add_edge("intake", END)
 
-graph = builder.compile(checkpointer=MemorySaver())
+_graph = None
+_graph_lock = asyncio.Lock()
+
+async def get_graph():
+    """Compile the graph on first use so the Redis checkpointer is set up inside the event loop"""
+    global _graph
+    async with _graph_lock:
+        if _graph is None:
+            if REDIS_URL:
+                from langgraph.checkpoint.redis.aio import AsyncRedisSaver
+                checkpointer = AsyncRedisSaver(redis_url=REDIS_URL)
+                await checkpointer.asetup()
+            else:
+                checkpointer = MemorySaver()
+            _graph = builder.compile(checkpointer=checkpointer)
+    return _graph
 
-def process_customer_message(text: str, conversation_id: Optional[str] = None) -> Dict[str, Any]:
+async def process_customer_message(text: str, conversation_id: Optional[str] = None) -> Dict[str, Any]:
     conv_id = conversation_id or str(uuid.uuid4())
-    if not store.get(conv_id):
-        store.create(conv_id)
+    if not await store.exists(conv_id):
+        await store.create(conv_id)
     
-    store.add_message(conv_id, "customer", text)
+    await store.add_message(conv_id, "customer", text)
     
-    conv = store.get(conv_id)
-    messages = [
-        HumanMessage(content=m["text"]) if m["role"] == "customer" else AIMessage(content=m["text"])
-        for m in conv["messages"]
-    ]
+    graph = await get_graph()
+    config = {"configurable": {"thread_id": conv_id}}
+    checkpoint = await graph.aget_state(config)
+    if checkpoint.values.get("messages"):
+        # Checkpointer already holds the history - send only the new turn
+        messages = [HumanMessage(content=text)]
+    else:
+        # No checkpoint for this thread yet: seed it once from the store
+        conv = await store.get(conv_id)
+        messages = [
+            HumanMessage(content=m["text"]) if m["role"] == "customer" else AIMessage(content=m["text"])
+            for m in conv["messages"]
+        ]
     
-    result = graph.invoke(
+    result = await graph.ainvoke(
         {
             "messages": messages,
             "conversation_id": conv_id,
-            "requirements": {},
-            "completeness": 0.0,
         },
-        config={"configurable": {"thread_id": conv_id}},
+        config=config,
     )
     
     last_ai = result["messages"][-1]
@@ -160,14 +267,13 @@ def process_customer_message(text: str, conversation_id: Optional[str] = None) -
         "ready_for_ceo": completeness >= 0.8,
     }
 
-def get_conversation(conversation_id: str) -> Dict[str, Any]:
-    conv = store.get(conversation_id)
+async def get_conversation(conversation_id: str) -> Dict[str, Any]:
+    conv = await store.get(conversation_id)
     if not conv:
         raise KeyError("Conversation not found")
     
-    all_text = " ".join(m["text"] for m in conv["messages"])
-    reqs = extract_requirements_from_text(all_text)
-    completeness = compute_completeness(reqs)
+    reqs = dict(conv["requirements"])
+    completeness = compute_completeness(conv)
     
     return {
         "conversation_id": conversation_id,
@@ -177,14 +283,13 @@ def get_conversation(conversation_id: str) -> Dict[str, Any]:
         "created_at": conv["created_at"],
     }
 
-def export_for_ceo(conversation_id: str) -> Dict[str, Any]:
-    conv = store.get(conversation_id)
+async def export_for_ceo(conversation_id: str) -> Dict[str, Any]:
+    conv = await store.get(conversation_id)
     if not conv:
         raise KeyError("Conversation not found")
     
-    all_text = " ".join(m["text"] for m in conv["messages"])
-    reqs = extract_requirements_from_text(all_text)
-    completeness = compute_completeness(reqs)
+    reqs = dict(conv["requirements"])
+    completeness = compute_completeness(conv)
     
     return {
         "conversation_id": conversation_id,
@@ -4,50 +4,195 @@ Automate.io API Gateway - Production Ready
 Customer Intake → CEO Planning → Agent Orchestration
 """
 import os
-import json
+import time
+import asyncio
+import hashlib
+import uuid
+import aiofiles
+import aiofiles.os
+import orjson
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import Dict, Any, Optional, List
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict
+from typing import Dict, Any, Optional, List, Tuple, Union
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from datetime import datetime
 import logging
 
 # Agent imports
 from Backend.agents import customer as customer_agent
 from Backend.agents import Ceo as ceo_agent_module
+from Backend.semantic_cache import SemanticCache
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Per-worker setup/teardown - keeps module import free of filesystem and model work"""
+    # Project data directories
+    os.makedirs("data/projects", exist_ok=True)
+    os.makedirs("data/jobs", exist_ok=True)
+    # Model load can mean a multi-hundred-MB download - serve requests meanwhile (exact cache only)
+    semantic_load = asyncio.create_task(asyncio.to_thread(SEMANTIC_CACHE.load)) if SEMANTIC_CACHE.enabled else None
+    yield
+    if semantic_load is not None and not semantic_load.done():
+        semantic_load.cancel()
+    await ceo_agent_module.aclose_http_client()
+    if LOCK_REDIS is not None:
+        await LOCK_REDIS.aclose()
 
 app = FastAPI(
     title="Automate.io API Gateway",
     description="Multi-agent marketing intelligence platform",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Logging configuration
+# LOG_LEVEL=WARNING in production skips INFO formatting entirely
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(
-    level=logging.INFO,
+    level=LOG_LEVEL,
     format="%(asctime)s %(levelname)s %(name)s: %(message)s",
 )
+# basicConfig is a no-op once an agent module has configured logging
+logging.getLogger().setLevel(LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
 # Instantiate CEO Agent
 CEO_AGENT = ceo_agent_module.CEOAgent()
-logger.info(f"✅ CEO Agent initialized: {CEO_AGENT.model}")
+logger.info("✅ CEO Agent initialized: %s", CEO_AGENT.model)
+
+# Project/job files are machine-written - compact output halves the bytes
+ORJSON_OPTS = orjson.OPT_NON_STR_KEYS
+
+# -------------------------
+# File helpers (non-blocking)
+# -------------------------
+async def write_json(path: str, data: Dict[str, Any]):
+    """Atomic write: a crash mid-write never leaves a truncated JSON behind"""
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    async with aiofiles.open(tmp_path, "wb") as f:
+        await f.write(orjson.dumps(data, option=ORJSON_OPTS))
+    await aiofiles.os.replace(tmp_path, path)
+
+# One lock per project so concurrent triggers don't lose each other's appends.
+# With REDIS_URL set the gateway may run several workers, so the lock lives in Redis;
+# otherwise (single worker) an in-process asyncio.Lock is enough.
+if customer_agent.REDIS_URL:
+    from redis.asyncio import Redis
+    LOCK_REDIS = Redis.from_url(customer_agent.REDIS_URL)
+else:
+    LOCK_REDIS = None
 
-# Project data directory
-os.makedirs("data/projects", exist_ok=True)
-os.makedirs("data/jobs", exist_ok=True)
+# project_id -> [lock, holders + waiters]; entries are dropped once nobody uses them
+PROJECT_LOCKS: Dict[str, List[Any]] = {}
+
+@asynccontextmanager
+async def project_lock(project_id: str):
+    if LOCK_REDIS is not None:
+        async with LOCK_REDIS.lock(f"lock:project:{project_id}", timeout=30, blocking_timeout=30):
+            yield
+        return
+
+    # No await between lookup and increment, so this is atomic on the event loop
+    entry = PROJECT_LOCKS.get(project_id)
+    if entry is None:
+        entry = PROJECT_LOCKS[project_id] = [asyncio.Lock(), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del PROJECT_LOCKS[project_id]
+
+async def append_agent_trigger(project_id: str, entry: Dict[str, Any]):
+    """Record a triggered agent job on the project file (no-op if the project doesn't exist)"""
+    project_path = f"data/projects/{project_id}.json"
+    async with project_lock(project_id):
+        try:
+            async with aiofiles.open(project_path, "rb") as f:
+                project = orjson.loads(await f.read())
+        except FileNotFoundError:
+            return
+        project["agents_triggered"].append(entry)
+        await write_json(project_path, project)
+
+# -------------------------
+# CEO plan cache (exact match on requirements)
+# -------------------------
+CEO_CACHE_MAX = 512
+CEO_CACHE_TTL = 3600  # seconds
+CEO_CACHE: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+def ceo_cache_key(requirements: Dict[str, Any], messages: List[Dict[str, str]] = ()) -> str:
+    # Insights are derived from the conversation, so it is part of the key
+    payload = orjson.dumps([requirements, messages], option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def conversation_key(messages: List[Dict[str, str]]) -> str:
+    return hashlib.blake2b(orjson.dumps(messages), digest_size=16).hexdigest()
+
+def ceo_cache_get(key: str) -> Optional[Dict[str, Any]]:
+    entry = CEO_CACHE.get(key)
+    if entry is None:
+        return None
+    stored_at, plan = entry
+    if time.monotonic() - stored_at > CEO_CACHE_TTL:
+        del CEO_CACHE[key]
+        return None
+    CEO_CACHE.move_to_end(key)
+    return plan
+
+def ceo_cache_put(key: str, plan: Dict[str, Any]):
+    CEO_CACHE[key] = (time.monotonic(), plan)
+    CEO_CACHE.move_to_end(key)
+    if len(CEO_CACHE) > CEO_CACHE_MAX:
+        CEO_CACHE.popitem(last=False)
+
+# Near-duplicate requirements ("50k" vs "₹50,000") - cosine >= 0.92 over MiniLM embeddings.
+# The parsed budget must match exactly: a plan's allocations and KPIs are derived from it.
+SEMANTIC_CACHE = SemanticCache(
+    threshold=0.92,
+    max_entries=CEO_CACHE_MAX,
+    ttl=CEO_CACHE_TTL,
+    match_key=lambda requirements: ceo_agent_module.safe_float(requirements.get("budget")),
+)
 
 # -------------------------
 # Request Models
 # -------------------------
+REQUEST_CONFIG = ConfigDict(extra="ignore", frozen=True)
+
 class CustomerMessage(BaseModel):
+    model_config = REQUEST_CONFIG
+
     conversation_id: Optional[str] = None
     text: str
 
+class Requirements(BaseModel):
+    """The six intake fields - typed so pydantic-core validates them in compiled code"""
+    model_config = REQUEST_CONFIG
+
+    product_service: Optional[str] = None
+    target_audience: Optional[str] = None
+    budget: Optional[Union[str, float]] = None
+    timeline: Optional[str] = None
+    channels: Optional[str] = None
+    goals: Optional[str] = None
+
 class CEORequest(BaseModel):
+    model_config = REQUEST_CONFIG
+
     conversation_id: Optional[str] = None
-    requirements: Dict[str, Any]
+    requirements: Requirements
+    messages: Optional[List[Dict[str, str]]] = None  # frontend sends null for an empty chat
 
 class AgentTriggerRequest(BaseModel):
+    model_config = REQUEST_CONFIG
+
     project_id: str
     params: Dict[str, Any]
 
@@ -58,7 +203,7 @@ class AgentTriggerRequest(BaseModel):
 async def post_customer_message(msg: CustomerMessage):
     """Customer chat intake - collects requirements"""
     try:
-        result = customer_agent.process_customer_message(msg.text, msg.conversation_id)
+        result = await customer_agent.process_customer_message(msg.text, msg.conversation_id)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Customer agent error: {str(e)}")
@@ -67,7 +212,7 @@ async def post_customer_message(msg: CustomerMessage):
 async def get_customer_conversation(conversation_id: str):
     """Get full conversation history"""
     try:
-        return customer_agent.get_conversation(conversation_id)
+        return await customer_agent.get_conversation(conversation_id)
     except KeyError:
         raise HTTPException(status_code=404, detail="Conversation not found")
     except Exception as e:
@@ -87,7 +232,7 @@ async def customer_ready_for_ceo(conversation_id: str):
 async def export_customer_for_ceo(conversation_id: str):
     """Export structured requirements for CEO"""
     try:
-        requirements = customer_agent.export_for_ceo(conversation_id)
+        requirements = await customer_agent.export_for_ceo(conversation_id)
         return {"conversation_id": conversation_id, "requirements": requirements}
     except KeyError:
         raise HTTPException(status_code=404, detail="Conversation not found")
@@ -97,8 +242,81 @@ async def export_customer_for_ceo(conversation_id: str):
 # -------------------------
 # CEO Strategic Planning
 # -------------------------
+async def save_project(conversation_id: str, requirements: Dict[str, Any], plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Persist a finished plan as a project and build the analyze response body"""
+    project_id = conversation_id
+    project_path = f"data/projects/{project_id}.json"
+    project_data = {
+        "project_id": project_id,
+        "conversation_id": conversation_id,
+        "requirements": requirements,
+        "ceo_plan": plan,
+        "status": "planning_complete",
+        "created_at": datetime.now().isoformat(),
+        "agents_triggered": [],
+        "model": CEO_AGENT.model
+    }
+    
+    await write_json(project_path, project_data)
+    
+    logger.info("✅ CEO Plan saved: %s", project_id)
+    
+    return {
+        "status": "success",
+        "project_id": project_id,
+        "conversation_id": conversation_id,
+        "plan": plan,
+        "rnd_trigger": plan.get("should_trigger_rnd", False),
+        "marketing_trigger": plan.get("should_trigger_marketing", False),
+        "success_probability": plan.get("success_probability", "Medium")
+    }
+
+async def lookup_cached_plan(requirements: Dict[str, Any], cache_key: str, conv_key: str) -> Optional[Dict[str, Any]]:
+    """Exact cache first, then near-identical requirements for the same conversation"""
+    plan = ceo_cache_get(cache_key)
+    if plan is not None:
+        logger.info("⚡ CEO plan served from cache: %s", cache_key)
+        return plan
+    if not SEMANTIC_CACHE.ready:
+        return None
+    plan = await asyncio.to_thread(SEMANTIC_CACHE.lookup, requirements, conv_key)
+    if plan is not None:
+        ceo_cache_put(cache_key, plan)
+    return plan
+
+async def cache_new_plan(requirements: Dict[str, Any], plan: Dict[str, Any], cache_key: str, conv_key: str):
+    if SEMANTIC_CACHE.ready:
+        await asyncio.to_thread(SEMANTIC_CACHE.add, requirements, plan, conv_key)
+    ceo_cache_put(cache_key, plan)
+
+async def stream_ceo_analysis(conversation_id: str, requirements: Dict[str, Any], messages: List[Dict[str, str]],
+                              cache_key: str, conv_key: str):
+    """
+    NDJSON frames: {"patch": [...]} JSON-patch deltas of the plan as the LLM writes it,
+    then {"result": <analyze response>} or {"error": "..."}
+    """
+    try:
+        plan = await lookup_cached_plan(requirements, cache_key, conv_key)
+        if plan is None:
+            async for frame in CEO_AGENT.stream_requirements(requirements, messages or None):
+                if "patch" in frame:
+                    yield orjson.dumps(frame, option=ORJSON_OPTS) + b"\n"
+                elif "error" in frame:
+                    yield orjson.dumps(frame) + b"\n"
+                    return
+                else:
+                    plan = frame["plan"]
+            await cache_new_plan(requirements, plan, cache_key, conv_key)
+        
+        result = await save_project(conversation_id, requirements, plan)
+        yield orjson.dumps({"result": result}, option=ORJSON_OPTS) + b"\n"
+        
+    except Exception as e:
+        logger.error("❌ CEO Analysis failed: %s", e)
+        yield orjson.dumps({"error": f"CEO Analysis failed: {str(e)}"}) + b"\n"
+
 @app.post("/api/v1/ceo/analyze")
-async def ceo_analyze(req: CEORequest):
+async def ceo_analyze(req: CEORequest, stream: bool = False):
     """
     CEO Analysis: Generate strategic plan from requirements
     
@@ -107,50 +325,40 @@ async def ceo_analyze(req: CEORequest):
     - Budget allocation (R&D/Content/Ads)
     - KPI targets
     - Agent trigger decisions
+    
+    ?stream=1 returns NDJSON frames as the plan is generated (see stream_ceo_analysis)
     """
     try:
         conversation_id = req.conversation_id or f"proj_{int(datetime.now().timestamp())}"
-        requirements = req.requirements
-        
-        logger.info(f"🤖 CEO Analysis starting: {requirements.get('product_service', 'Unknown')}")
+        requirements = req.requirements.model_dump()
         
-        # Generate CEO plan
-        plan = CEO_AGENT.analyze_requirements(requirements)
+        logger.info("🤖 CEO Analysis starting: %s", requirements.get('product_service', 'Unknown'))
         
-        if not plan:
-            raise Exception("CEO Agent returned empty plan")
-        
-        # Persist project
-        project_id = conversation_id
-        project_path = f"data/projects/{project_id}.json"
-        project_data = {
-            "project_id": project_id,
-            "conversation_id": conversation_id,
-            "requirements": requirements,
-            "ceo_plan": plan,
-            "status": "planning_complete",
-            "created_at": datetime.now().isoformat(),
-            "agents_triggered": [],
-            "model": CEO_AGENT.model
-        }
+        messages = list(req.messages or [])
+        cache_key = ceo_cache_key(requirements, messages)
+        conv_key = conversation_key(messages)
         
-        with open(project_path, "w", encoding="utf-8") as f:
-            json.dump(project_data, f, ensure_ascii=False, indent=2)
+        if stream:
+            return StreamingResponse(
+                stream_ceo_analysis(conversation_id, requirements, messages, cache_key, conv_key),
+                media_type="application/x-ndjson"
+            )
         
-        logger.info(f"✅ CEO Plan saved: {project_id}")
+        # Generate CEO plan (identical, then near-identical requirements for the same conversation reuse a cached plan)
+        plan = await lookup_cached_plan(requirements, cache_key, conv_key)
+        if plan is None:
+            plan = await CEO_AGENT.analyze_requirements(requirements, messages or None)
+            
+            if not plan:
+                raise Exception("CEO Agent returned empty plan")
+            
+            await cache_new_plan(requirements, plan, cache_key, conv_key)
         
-        return {
-            "status": "success",
-            "project_id": project_id,
-            "conversation_id": conversation_id,
-            "plan": plan,
-            "rnd_trigger": plan.get("should_trigger_rnd", False),
-            "marketing_trigger": plan.get("should_trigger_marketing", False),
-            "success_probability": plan.get("success_probability", "Medium")
-        }
+        # The plan is complete in memory - one orjson pass (default ORJSONResponse) keeps Content-Length
+        return await save_project(conversation_id, requirements, plan)
         
     except Exception as e:
-        logger.error(f"❌ CEO Analysis failed: {str(e)}")
+        logger.error("❌ CEO Analysis failed: %s", e)
         raise HTTPException(status_code=500, detail=f"CEO Analysis failed: {str(e)}")
 
 @app.get("/api/v1/ceo/{project_id}")
@@ -158,8 +366,8 @@ async def get_ceo_plan(project_id: str):
     """Get saved CEO plan"""
     try:
         project_path = f"data/projects/{project_id}.json"
-        with open(project_path, "r") as f:
-            project_data = json.load(f)
+        async with aiofiles.open(project_path, "rb") as f:
+            project_data = orjson.loads(await f.read())
         return project_data
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -177,57 +385,57 @@ async def ceo_status():
             "plan_cached": CEO_AGENT.last_plan is not None
         }
     except Exception as e:
-        logger.error(f"❌ CEO Status error: {str(e)}")
+        logger.error("❌ CEO Status error: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 # -------------------------
 # Agent Orchestration
 # -------------------------
+AGENT_LABELS = {"rnd": "R&D", "marketing": "Marketing"}
+
+async def _trigger(agent: str, prefix: str, emoji: str, trigger: AgentTriggerRequest) -> Dict[str, Any]:
+    """Queue an agent job and record it on the project"""
+    project_id = trigger.project_id
+    now = datetime.now()
+    created_at = now.isoformat()
+    
+    # Create agent job
+    job_id = f"{prefix}_{int(now.timestamp())}"
+    job_data = {
+        "job_id": job_id,
+        "project_id": project_id,
+        "agent": agent,
+        "params": trigger.params,
+        "status": "queued",
+        "created_at": created_at
+    }
+    
+    # Write job + update project status concurrently
+    job_path = f"data/jobs/{job_id}.json"
+    await asyncio.gather(
+        write_json(job_path, job_data),
+        append_agent_trigger(project_id, {
+            "agent": agent,
+            "job_id": job_id,
+            "status": "queued",
+            "timestamp": created_at
+        })
+    )
+    
+    logger.info("%s %s Agent triggered: %s", emoji, AGENT_LABELS[agent], job_id)
+    return {
+        "status": "success",
+        "job_id": job_id,
+        "agent": agent,
+        "queue_status": "queued",
+        "next_check": f"/api/v1/jobs/{job_id}"
+    }
+
 @app.post("/api/v1/rnd/trigger")
 async def trigger_rnd_agent(trigger: AgentTriggerRequest):
     """Trigger R&D Research Agent"""
     try:
-        project_id = trigger.project_id
-        rnd_params = trigger.params
-        
-        # Create R&D job
-        job_id = f"rnd_{int(datetime.now().timestamp())}"
-        job_data = {
-            "job_id": job_id,
-            "project_id": project_id,
-            "agent": "rnd",
-            "params": rnd_params,
-            "status": "queued",
-            "created_at": datetime.now().isoformat()
-        }
-        
-        job_path = f"data/jobs/{job_id}.json"
-        with open(job_path, "w") as f:
-            json.dump(job_data, f, indent=2)
-        
-        # Update project status
-        project_path = f"data/projects/{project_id}.json"
-        if os.path.exists(project_path):
-            with open(project_path, "r+") as f:
-                project = json.load(f)
-                project["agents_triggered"].append({
-                    "agent": "rnd",
-                    "job_id": job_id,
-                    "status": "queued",
-                    "timestamp": datetime.now().isoformat()
-                })
-                f.seek(0)
-                json.dump(project, f, indent=2)
-        
-        logger.info(f"🔬 R&D Agent triggered: {job_id}")
-        return {
-            "status": "success",
-            "job_id": job_id,
-            "agent": "rnd",
-            "queue_status": "queued",
-            "next_check": f"/api/v1/jobs/{job_id}"
-        }
-        
+        return await _trigger("rnd", "rnd", "🔬", trigger)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"R&D trigger failed: {str(e)}")
 
@@ -235,47 +443,7 @@ async def trigger_rnd_agent(trigger: AgentTriggerRequest):
 async def trigger_marketing_agent(trigger: AgentTriggerRequest):
     """Trigger Marketing Execution Agent"""
     try:
-        project_id = trigger.project_id
-        marketing_params = trigger.params
-        
-        # Create Marketing job
-        job_id = f"mkt_{int(datetime.now().timestamp())}"
-        job_data = {
-            "job_id": job_id,
-            "project_id": project_id,
-            "agent": "marketing",
-            "params": marketing_params,
-            "status": "queued",
-            "created_at": datetime.now().isoformat()
-        }
-        
-        job_path = f"data/jobs/{job_id}.json"
-        with open(job_path, "w") as f:
-            json.dump(job_data, f, indent=2)
-        
-        # Update project
-        project_path = f"data/projects/{project_id}.json"
-        if os.path.exists(project_path):
-            with open(project_path, "r+") as f:
-                project = json.load(f)
-                project["agents_triggered"].append({
-                    "agent": "marketing",
-                    "job_id": job_id,
-                    "status": "queued",
-                    "timestamp": datetime.now().isoformat()
-                })
-                f.seek(0)
-                json.dump(project, f, indent=2)
-        
-        logger.info(f"📢 Marketing Agent triggered: {job_id}")
-        return {
-            "status": "success",
-            "job_id": job_id,
-            "agent": "marketing",
-            "queue_status": "queued",
-            "next_check": f"/api/v1/jobs/{job_id}"
-        }
-        
+        return await _trigger("marketing", "mkt", "📢", trigger)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Marketing trigger failed: {str(e)}")
 
@@ -284,53 +452,64 @@ async def get_job_status(job_id: str):
     """Get agent job status"""
     try:
         job_path = f"data/jobs/{job_id}.json"
-        with open(job_path, "r") as f:
-            return json.load(f)
+        async with aiofiles.open(job_path, "rb") as f:
+            return orjson.loads(await f.read())
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Job not found")
 
 # -------------------------
 # Health & Status
 # -------------------------
+# Static parts of the root/health payloads - built once at import
+_ROOT_BASE = {
+    "status": "🚀 Automate.io API v2.0 - LIVE",
+    "services": {
+        "customer": [
+            "POST /api/v1/customer/message",
+            "GET  /api/v1/customer/{id}",
+            "GET  /api/v1/customer/ready/{id}",
+            "POST /api/v1/customer/export/{id}"
+        ],
+        "ceo": [
+            "POST /api/v1/ceo/analyze",
+            "GET  /api/v1/ceo/{project_id}",
+            "GET  /api/v1/ceo/status"
+        ],
+        "agents": [
+            "POST /api/v1/rnd/trigger",
+            "POST /api/v1/marketing/trigger",
+            "GET  /api/v1/jobs/{job_id}"
+        ]
+    }
+}
+_CEO_AGENT_BASE = {"model": CEO_AGENT.model, "initialized": True}
+_HEALTH_BASE = {"status": "healthy", "ceo_agent": "online"}
+
 @app.get("/")
 async def root():
     """Root endpoint - list all services"""
     return {
-        "status": "🚀 Automate.io API v2.0 - LIVE",
-        "services": {
-            "customer": [
-                "POST /api/v1/customer/message",
-                "GET  /api/v1/customer/{id}",
-                "GET  /api/v1/customer/ready/{id}",
-                "POST /api/v1/customer/export/{id}"
-            ],
-            "ceo": [
-                "POST /api/v1/ceo/analyze",
-                "GET  /api/v1/ceo/{project_id}",
-                "GET  /api/v1/ceo/status"
-            ],
-            "agents": [
-                "POST /api/v1/rnd/trigger",
-                "POST /api/v1/marketing/trigger",
-                "GET  /api/v1/jobs/{job_id}"
-            ]
-        },
-        "ceo_agent": {
-            "model": CEO_AGENT.model,
-            "initialized": True,
-            "plan_cached": CEO_AGENT.last_plan is not None
-        }
+        **_ROOT_BASE,
+        "ceo_agent": {**_CEO_AGENT_BASE, "plan_cached": CEO_AGENT.last_plan is not None}
     }
 
 @app.get("/health")
 async def health():
     """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.now().isoformat(),
-        "ceo_agent": "online"
-    }
+    return {**_HEALTH_BASE, "timestamp": datetime.now().isoformat()}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    dev = bool(int(os.getenv("DEV", "0")))
+    # Conversation state is only shared across workers when REDIS_URL is set
+    workers = int(os.getenv("WORKERS", "4" if os.getenv("REDIS_URL") else "1"))
+    uvicorn.run(
+        "Backend.main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=1 if dev else workers,
+        # uvicorn[standard] installs uvloop/httptools where supported; "auto" falls back on Windows
+        loop="auto",
+        http="auto",
+        reload=dev
+    )
\ No newline at end of file
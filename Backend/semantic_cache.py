@@ -0,0 +1,126 @@
+"""
+semantic_cache.py
+Near-duplicate CEO plan cache - cosine similarity over sentence embeddings
+"""
+import time
+import logging
+import threading
+from typing import Callable, Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # semantic layer is optional - exact-match cache still works
+    np = None
+    SentenceTransformer = None
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+REQUIREMENT_FIELDS = ("product_service", "target_audience", "budget", "timeline", "channels", "goals")
+
+
+class SemanticCache:
+    """Return a cached plan when a new requirements dict is close enough to a previous one"""
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        max_entries: int = 512,
+        ttl: float = 3600,
+        match_key: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        model_name: str = MODEL_NAME,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # Fields embeddings can't tell apart (e.g. "50000" vs "5000000") must match exactly
+        self.match_key = match_key or (lambda requirements: None)
+        self.model_name = model_name
+        self.enabled = SentenceTransformer is not None
+        self._model = None
+        self._lock = threading.Lock()
+        self._embeddings = None  # (n, d) matrix of L2-normalized rows
+        self._plans: List[Dict[str, Any]] = []
+        self._keys: List[Any] = []
+        self._stored_at: List[float] = []
+
+        if not self.enabled:
+            logger.info("ℹ️ sentence-transformers not installed (requirements-semantic.txt) - semantic CEO cache disabled")
+
+    @property
+    def ready(self) -> bool:
+        """True once the model is loaded - until then lookups/adds are skipped, never blocked on"""
+        return self.enabled and self._model is not None
+
+    def load(self):
+        """Load the embedding model (blocking, may download - run in a background thread)"""
+        with self._lock:
+            if self.enabled and self._model is None:
+                try:
+                    model = SentenceTransformer(self.model_name)
+                except Exception as e:  # offline / no HF cache - fall back to exact-match caching only
+                    self.enabled = False
+                    logger.warning("⚠️ Semantic cache disabled - could not load %s: %.100s", self.model_name, e)
+                    return
+                self._embeddings = np.empty((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+                self._model = model  # set last: `ready` flips only once everything is in place
+                logger.info("✅ Semantic cache model loaded: %s", self.model_name)
+
+    @staticmethod
+    def _text(requirements: Dict[str, Any]) -> str:
+        return "|".join(str(requirements.get(k) or "") for k in REQUIREMENT_FIELDS)
+
+    def _embed(self, requirements: Dict[str, Any]):
+        if not self.ready:
+            return None
+        return self._model.encode(self._text(requirements), normalize_embeddings=True).astype(np.float32)
+
+    def _evict_expired(self):
+        """Drop entries older than ttl (caller holds the lock; rows are in insertion order)"""
+        cutoff = time.monotonic() - self.ttl
+        expired = 0
+        while expired < len(self._stored_at) and self._stored_at[expired] < cutoff:
+            expired += 1
+        if expired:
+            self._embeddings = self._embeddings[expired:]
+            del self._plans[:expired], self._keys[:expired], self._stored_at[:expired]
+
+    def lookup(self, requirements: Dict[str, Any], context: Any = None) -> Optional[Dict[str, Any]]:
+        """
+        Best cached plan with cosine >= threshold, else None (blocking)
+        `context` (e.g. a conversation hash) must match exactly, like match_key
+        """
+        if not self.ready:
+            return None
+        query = self._embed(requirements)
+        if query is None:
+            return None
+        key = (self.match_key(requirements), context)
+        with self._lock:
+            self._evict_expired()
+            if not self._plans:
+                return None
+            scores = self._embeddings @ query
+            # Only entries whose exact-match key agrees are candidates
+            scores[np.array([k != key for k in self._keys])] = -1.0
+            best = int(scores.argmax())
+            if scores[best] < self.threshold:
+                return None
+            logger.info("⚡ Semantic cache hit (cosine=%.3f)", scores[best])
+            return self._plans[best]
+
+    def add(self, requirements: Dict[str, Any], plan: Dict[str, Any], context: Any = None):
+        """Store a plan under the embedding of its requirements (blocking)"""
+        if not self.ready:
+            return
+        vector = self._embed(requirements)
+        if vector is None:
+            return
+        key = (self.match_key(requirements), context)
+        with self._lock:
+            self._evict_expired()
+            self._embeddings = np.vstack([self._embeddings, vector])[-self.max_entries:]
+            self._plans = (self._plans + [plan])[-self.max_entries:]
+            self._keys = (self._keys + [key])[-self.max_entries:]
+            self._stored_at = (self._stored_at + [time.monotonic()])[-self.max_entries:]
@@ -1,12 +1,15 @@
 import streamlit as st
-import requests
+import httpx
 import json
 from datetime import datetime
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
-import random
+import secrets
+import time
 import logging
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # annotations only - plotly itself is imported lazily by the chart builders
+    import plotly.graph_objects as go
 
 # ========================
 # LOGGING SETUP
@@ -18,6 +21,17 @@ logger = logging.getLogger(__name__)
 # CONFIGURATION
 # ========================
 BACKEND_URL = st.secrets.get("backend_url", "http://localhost:8000")
+REQ_FIELDS = ("product_service", "target_audience", "budget", "timeline", "channels", "goals")
+
+@st.cache_resource
+def get_http_client() -> httpx.Client:
+    """Persistent HTTP/2 client shared across reruns (keeps backend connections alive)"""
+    return httpx.Client(
+        base_url=BACKEND_URL,
+        http2=True,
+        timeout=60,
+        limits=httpx.Limits(max_keepalive_connections=10)
+    )
 
 st.set_page_config(
     page_title="Automate.io",
@@ -52,16 +66,10 @@ def init_session_state():
     defaults = {
         "page": "💬 Customer Chat",
         "messages": [],
-        "requirements": {
-            "product_service": None,
-            "target_audience": None,
-            "budget": None,
-            "timeline": None,
-            "channels": None,
-            "goals": None
-        },
+        "requirements": {k: None for k in REQ_FIELDS},
         "conversation_id": None,
         "ceo_plan": None,
+        "plan_filename": "ceo_plan.json",
         "analyzing": False,
         "plan_error": None,
         "marketing_leads": [],
@@ -77,34 +85,64 @@ init_session_state()
 # ========================
 # HELPER FUNCTIONS
 # ========================
-def calculate_progress_percentage():
-    """Calculate progress percentage based on filled requirements"""
-    requirements = st.session_state.requirements
-    filled_count = 0
-    
-    if requirements.get("product_service") and str(requirements.get("product_service")).strip():
-        filled_count += 1
-    if requirements.get("target_audience") and str(requirements.get("target_audience")).strip():
-        filled_count += 1
-    if requirements.get("budget") and str(requirements.get("budget")).strip():
-        filled_count += 1
-    if requirements.get("timeline") and str(requirements.get("timeline")).strip():
-        filled_count += 1
-    if requirements.get("channels") and str(requirements.get("channels")).strip():
-        filled_count += 1
-    if requirements.get("goals") and str(requirements.get("goals")).strip():
-        filled_count += 1
-    
-    return (filled_count / 6) * 100
-
-def check_field_filled(field_key):
-    """Check if a specific field is filled"""
-    value = st.session_state.requirements.get(field_key)
-    return value is not None and str(value).strip() != ""
+def _is_filled(value) -> bool:
+    """A requirement counts as filled when it has non-blank content"""
+    return bool(value) and bool(str(value).strip())
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _progress_snapshot(req_tuple: tuple):
+    """Single pass over the requirements: (progress percentage, {field: filled})"""
+    requirements = dict(req_tuple)
+    filled = {k: _is_filled(requirements.get(k)) for k in REQ_FIELDS}
+    return sum(filled.values()) / len(REQ_FIELDS) * 100, filled
+
+def progress_snapshot():
+    """Progress for the current session's requirements (cached per distinct values)"""
+    return _progress_snapshot(tuple(sorted(st.session_state.requirements.items())))
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _plan_json(plan: dict) -> bytes:
+    """Pretty-printed plan for the download button (bytes skip Streamlit's own encoding)"""
+    return json.dumps(plan, indent=2, ensure_ascii=False).encode("utf-8")
+
+CHAT_VISIBLE_MESSAGES = 50  # older messages render only when toggled on
+
+_USER_BUBBLE_TMPL = """
+<div style='display: flex; justify-content: flex-end; margin: 0.8rem 0;'>
+    <div style='background: linear-gradient(135deg, #3b82f6, #8b5cf6); color: white; 
+               padding: 0.9rem 1.2rem; border-radius: 18px 18px 4px 18px; max-width: 75%;'>
+        {content}
+    </div>
+</div>
+"""
+
+_ASSISTANT_BUBBLE_TMPL = """
+<div style='display: flex; justify-content: flex-start; margin: 0.8rem 0;'>
+    <div style='background: rgba(30, 41, 59, 0.7); color: #e8ecf5; 
+               padding: 0.9rem 1.2rem; border-radius: 18px 18px 18px 4px; max-width: 75%;'>
+        {content}
+    </div>
+</div>
+"""
+
+_EMPTY_CHAT_HTML = """
+<div style='text-align: center; padding: 4rem 2rem; color: #64748b;'>
+    <div style='font-size: 3.5rem;'>💬</div>
+    <div>Start describing your product, audience, budget...</div>
+</div>
+"""
+
+def render_chat_html(messages: list) -> str:
+    """Chat bubbles for a list of messages, as one HTML string"""
+    return "".join(
+        (_USER_BUBBLE_TMPL if msg["role"] == "user" else _ASSISTANT_BUBBLE_TMPL).format(content=msg["content"])
+        for msg in messages
+    )
 
 # ========================
 # MOCK DATA FUNCTIONS
 # ========================
+@st.cache_data(ttl=3600)
 def get_market_research_data():
     """Mock market research data"""
     return {
@@ -131,6 +169,7 @@ def get_market_research_data():
         ]
     }
 
+@st.cache_data(ttl=3600)
 def get_competitor_analysis():
     """Mock competitor analysis data"""
     return {
@@ -171,6 +210,7 @@ def get_competitor_analysis():
         }
     }
 
+@st.cache_data(ttl=3600)
 def get_campaign_performance_data():
     """Mock campaign performance data"""
     dates = pd.date_range(start='2025-12-01', periods=30, freq='D')
@@ -183,6 +223,7 @@ def get_campaign_performance_data():
         'Spend': [5000 + i*200 for i in range(30)]
     })
 
+@st.cache_data(ttl=3600)
 def get_channel_performance():
     """Mock channel performance data"""
     return pd.DataFrame({
@@ -194,6 +235,7 @@ def get_channel_performance():
         'Cost_Per_Lead': [450, 320, 580, 750, 420]
     })
 
+@st.cache_data(ttl=3600)
 def get_audience_demographics():
     """Mock audience demographics"""
     return {
@@ -222,75 +264,102 @@ def get_audience_demographics():
         ]
     }
 
+LEADS_CB_THRESHOLD = 3      # consecutive failures before the breaker opens
+LEADS_CB_COOLDOWN = 30      # seconds to serve mock leads without calling the backend
+
+MOCK_LEADS = [
+    {
+        "id": 1,
+        "name": "Rajesh Kumar",
+        "email": "rajesh.kumar@techcorp.com",
+        "channel": "Email",
+        "company": "TechCorp India",
+        "position": "Marketing Manager",
+        "status": "Engaged",
+        "interest_score": 8.5,
+        "date_collected": "2026-01-04"
+    },
+    {
+        "id": 2,
+        "name": "Priya Sharma",
+        "email": "priya.sharma@healthplus.in",
+        "channel": "LinkedIn",
+        "company": "HealthPlus Solutions",
+        "position": "Wellness Director",
+        "status": "Highly Engaged",
+        "interest_score": 9.2,
+        "date_collected": "2026-01-04"
+    },
+    {
+        "id": 3,
+        "name": "Amit Patel",
+        "email": "amit.patel@wellness.org",
+        "channel": "Email",
+        "company": "Wellness Center India",
+        "position": "Operations Lead",
+        "status": "Engaged",
+        "interest_score": 7.8,
+        "date_collected": "2026-01-03"
+    },
+    {
+        "id": 4,
+        "name": "Neha Verma",
+        "email": "neha.verma@fitlife.com",
+        "channel": "LinkedIn",
+        "company": "FitLife Academy",
+        "position": "Content Head",
+        "status": "Moderately Engaged",
+        "interest_score": 6.9,
+        "date_collected": "2026-01-03"
+    },
+    {
+        "id": 5,
+        "name": "Vikram Singh",
+        "email": "vikram.singh@ayurved.in",
+        "channel": "Email",
+        "company": "Ayurved Health",
+        "position": "Product Manager",
+        "status": "Highly Engaged",
+        "interest_score": 8.7,
+        "date_collected": "2026-01-02"
+    }
+]
+
+@st.cache_resource
+def _leads_breaker() -> dict:
+    """Circuit-breaker state for the leads endpoint (shared across reruns)"""
+    return {"fails": 0, "open_until": 0.0}
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_leads() -> list:
+    """Leads from the backend - raises on failure so errors are never cached"""
+    response = get_http_client().get(
+        "/api/v1/marketing/leads",
+        timeout=10
+    )
+    response.raise_for_status()
+    return response.json().get("leads", [])
+
 def get_marketing_leads_from_n8n():
-    """Fetch leads from backend"""
+    """Fetch leads from backend (fails fast to mock leads while the backend is down)"""
+    breaker = _leads_breaker()
+    if time.time() < breaker["open_until"]:
+        return MOCK_LEADS
+
     try:
-        response = requests.get(
-            f"{BACKEND_URL}/api/v1/marketing/leads",
-            timeout=10
-        )
-        response.raise_for_status()
-        data = response.json()
-        return data.get("leads", [])
-    except:
-        return [
-            {
-                "id": 1,
-                "name": "Rajesh Kumar",
-                "email": "rajesh.kumar@techcorp.com",
-                "channel": "Email",
-                "company": "TechCorp India",
-                "position": "Marketing Manager",
-                "status": "Engaged",
-                "interest_score": 8.5,
-                "date_collected": "2026-01-04"
-            },
-            {
-                "id": 2,
-                "name": "Priya Sharma",
-                "email": "priya.sharma@healthplus.in",
-                "channel": "LinkedIn",
-                "company": "HealthPlus Solutions",
-                "position": "Wellness Director",
-                "status": "Highly Engaged",
-                "interest_score": 9.2,
-                "date_collected": "2026-01-04"
-            },
-            {
-                "id": 3,
-                "name": "Amit Patel",
-                "email": "amit.patel@wellness.org",
-                "channel": "Email",
-                "company": "Wellness Center India",
-                "position": "Operations Lead",
-                "status": "Engaged",
-                "interest_score": 7.8,
-                "date_collected": "2026-01-03"
-            },
-            {
-                "id": 4,
-                "name": "Neha Verma",
-                "email": "neha.verma@fitlife.com",
-                "channel": "LinkedIn",
-                "company": "FitLife Academy",
-                "position": "Content Head",
-                "status": "Moderately Engaged",
-                "interest_score": 6.9,
-                "date_collected": "2026-01-03"
-            },
-            {
-                "id": 5,
-                "name": "Vikram Singh",
-                "email": "vikram.singh@ayurved.in",
-                "channel": "Email",
-                "company": "Ayurved Health",
-                "position": "Product Manager",
-                "status": "Highly Engaged",
-                "interest_score": 8.7,
-                "date_collected": "2026-01-02"
-            }
-        ]
+        leads = _fetch_leads()
+        breaker["fails"] = 0
+        return leads
+    except Exception as e:
+        breaker["fails"] += 1
+        if breaker["fails"] >= LEADS_CB_THRESHOLD:
+            breaker["open_until"] = time.time() + LEADS_CB_COOLDOWN
+            logger.warning(f"⚠️ Leads backend unavailable ({breaker['fails']} failures), serving mock leads for {LEADS_CB_COOLDOWN}s")
+        else:
+            logger.error(f"Error fetching leads: {str(e)}")
+        return MOCK_LEADS
 
+@st.cache_data(ttl=3600)
 def get_marketing_campaigns():
     """Get active marketing campaigns"""
     return [
@@ -325,16 +394,129 @@ def get_marketing_campaigns():
         }
     ]
 
+# ========================
+# TABLE BUILDERS
+# ========================
+# Keyed on the identifying column only; the raw rows are passed unhashed (leading underscore).
+# TTLs match the providers so a cached table never outlives the data it was built from.
+_LEAD_COLUMNS = {
+    "name": "Name",
+    "email": "Email",
+    "company": "Company",
+    "position": "Position",
+    "channel": "Channel",
+    "interest_score": "Interest Score",
+    "status": "Status",
+    "date_collected": "Date"
+}
+_COMPETITOR_COLUMNS = {
+    "name": "Competitor",
+    "market_share": "Market Share",
+    "price_range": "Price Range",
+    "strength": "Strength",
+    "weakness": "Weakness"
+}
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _build_leads_df(key: tuple, _leads: list) -> pd.DataFrame:
+    """Lead Database table for the marketing page"""
+    # reindex tolerates leads missing a field, like the old per-row .get()
+    df = pd.DataFrame(_leads).reindex(columns=list(_LEAD_COLUMNS))
+    df["interest_score"] = df["interest_score"].fillna(0).astype(str) + "/10"
+    return df.rename(columns=_LEAD_COLUMNS)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _build_competitor_df(key: tuple, _competitors: list) -> pd.DataFrame:
+    """Competitor Benchmarking table for the R&D page"""
+    return pd.DataFrame(_competitors)[list(_COMPETITOR_COLUMNS)].rename(columns=_COMPETITOR_COLUMNS)
+
+# ========================
+# CHART BUILDERS
+# ========================
+# cache_resource hands back the same Figure each rerun - Plotly figures are costly to deep-copy
+# plotly is imported inside each builder so Home/Chat never pay its import cost
+@st.cache_resource(show_spinner=False)
+def build_trend_fig(df: pd.DataFrame, column: str, color: str, title: str) -> "go.Figure":
+    """Line/area trend of one campaign metric (cached per DataFrame hash)"""
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=df['Date'],
+        y=df[column],
+        mode='lines+markers',
+        name=column,
+        line=dict(color=color, width=3),
+        fill='tozeroy'
+    ))
+    fig.update_layout(title=title, template="plotly_dark", height=350)
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def build_channel_fig(df: pd.DataFrame, column: str, title: str) -> "go.Figure":
+    """Bar chart of one channel metric (cached per DataFrame hash)"""
+    import plotly.express as px
+    fig = px.bar(df, x='Channel', y=column, title=title)
+    fig.update_layout(template="plotly_dark", height=350)
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def build_age_fig(age_groups: tuple) -> "go.Figure":
+    """Audience age split pie, from ((age_group, percentage), ...)"""
+    import plotly.express as px
+    age_df = pd.DataFrame(list(age_groups), columns=['Age Group', 'Percentage'])
+    fig = px.pie(age_df, values='Percentage', names='Age Group', title="Audience by Age Group")
+    fig.update_layout(template="plotly_dark", height=350)
+    return fig
+
+@st.cache_resource(show_spinner=False)
+def build_market_trends_fig() -> "go.Figure":
+    """Market trend adoption vs growth potential (static data)"""
+    import plotly.express as px
+    trend_data = pd.DataFrame({
+        'Trend': ['E-commerce', 'Subscription Models', 'Personalization', 'Sustainability', 'Direct-to-Consumer'],
+        'Adoption': [78, 52, 65, 58, 71],
+        'Growth Potential': [85, 92, 88, 95, 89]
+    })
+    fig = px.bar(trend_data, x='Trend', y=['Adoption', 'Growth Potential'],
+                 title="Market Trends & Growth Potential",
+                 barmode='group',
+                 labels={'value': 'Score (%)', 'variable': 'Metric'})
+    fig.update_layout(template="plotly_dark", height=400)
+    return fig
+
 # ========================
 # BACKEND API FUNCTIONS
 # ========================
+CEO_HISTORY_TAIL = 8        # recent turns sent verbatim to the CEO Agent
+SUMMARY_SNIPPET_CHARS = 150  # per older customer message
+SUMMARY_MAX_CHARS = 800
+
+# Shared by all sessions and keyed on each distinct history prefix - bound it
+@st.cache_data(show_spinner=False, max_entries=256, ttl=3600)
+def summarize_history(older_messages: list) -> str:
+    """Compact local summary of the turns that fall outside the CEO history window"""
+    customer_said = " | ".join(
+        msg["content"][:SUMMARY_SNIPPET_CHARS]
+        for msg in older_messages
+        if msg["role"] == "user"
+    )
+    summary = f"Summary of {len(older_messages)} earlier messages. Customer said: {customer_said}"
+    return summary[:SUMMARY_MAX_CHARS]
+
+def windowed_history(messages: list) -> list:
+    """Last CEO_HISTORY_TAIL turns, prefixed with a summary of anything older"""
+    if len(messages) <= CEO_HISTORY_TAIL:
+        return messages
+    summary = summarize_history(messages[:-CEO_HISTORY_TAIL])
+    return [{"role": "system", "content": summary}] + messages[-CEO_HISTORY_TAIL:]
+
 def send_message(text: str) -> bool:
     """Send customer message to backend"""
     st.session_state.messages.append({"role": "user", "content": text})
     
     try:
-        response = requests.post(
-            f"{BACKEND_URL}/api/v1/customer/message",
+        response = get_http_client().post(
+            "/api/v1/customer/message",
             json={
                 "conversation_id": st.session_state.conversation_id,
                 "text": text
@@ -352,11 +534,12 @@ def send_message(text: str) -> bool:
         
         collected_requirements = data.get("requirements_collected", {})
         if collected_requirements:
-            for key in ["product_service", "target_audience", "budget", "timeline", "channels", "goals"]:
-                if key in collected_requirements:
-                    value = collected_requirements[key]
-                    if value and str(value).strip():
-                        st.session_state.requirements[key] = value
+            updates = {
+                key: value for key in REQ_FIELDS
+                if _is_filled(value := collected_requirements.get(key))
+            }
+            if updates:
+                st.session_state.requirements = {**st.session_state.requirements, **updates}
         
         return True
         
@@ -368,6 +551,15 @@ def send_message(text: str) -> bool:
         })
         return False
 
+def normalize_plan(plan):
+    """Decode string-encoded conversation insights once, so page reruns always see a dict"""
+    if isinstance(plan, dict) and isinstance(plan.get("conversation_insights"), str):
+        try:
+            plan["conversation_insights"] = json.loads(plan["conversation_insights"])
+        except json.JSONDecodeError:
+            plan["conversation_insights"] = {}
+    return plan
+
 def generate_ceo_plan() -> bool:
     """
     Call CEO Agent with chat requirements AND conversation history
@@ -376,32 +568,46 @@ def generate_ceo_plan() -> bool:
     st.session_state.plan_error = None
     
     try:
-        # Prepare messages for backend
-        messages_payload = [
-            {
-                "role": msg["role"],
-                "content": msg["content"]
-            }
-            for msg in st.session_state.messages
-        ] if st.session_state.messages else None
+        # Messages are already {"role", "content"} dicts - only older turns get summarized
+        messages_payload = windowed_history(st.session_state.messages) or None
         
-        logger.info(f"📤 Sending {len(st.session_state.messages)} messages to CEO Agent")
+        logger.info(f"📤 Sending {len(messages_payload or [])} of {len(st.session_state.messages)} messages to CEO Agent")
         
-        response = requests.post(
-            f"{BACKEND_URL}/api/v1/ceo/analyze",
+        # NDJSON stream: plan deltas while the LLM writes, then the final result frame
+        data = {}
+        progress = st.empty()
+        sections = set()
+        with get_http_client().stream(
+            "POST",
+            "/api/v1/ceo/analyze",
+            params={"stream": 1},
             json={
                 "conversation_id": st.session_state.conversation_id,
                 "requirements": st.session_state.requirements,
                 "messages": messages_payload
             },
             timeout=60
-        )
-        
-        response.raise_for_status()
-        data = response.json()
+        ) as response:
+            if response.is_error:
+                response.read()  # so the HTTPStatusError handler can read the detail
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                frame = json.loads(line)
+                if "patch" in frame:
+                    sections.update(op["path"].split("/")[1] for op in frame["patch"] if op["path"].count("/"))
+                    progress.caption(f"✍️ Receiving plan... {len(sections)} sections so far")
+                elif "error" in frame:
+                    data = {"error": frame["error"]}
+                else:
+                    data = frame.get("result", {})
+        progress.empty()
         
         if data.get("status") == "success":
-            st.session_state.ceo_plan = data.get("plan")
+            st.session_state.ceo_plan = normalize_plan(data.get("plan"))
+            plan_name = ((st.session_state.ceo_plan or {}).get("project_name") or "plan").replace(" ", "_")
+            st.session_state.plan_filename = f"ceo_plan_{plan_name}.json"
             st.session_state.plan_error = None
             st.session_state.analyzing = False
             return True
@@ -411,19 +617,19 @@ def generate_ceo_plan() -> bool:
             st.session_state.analyzing = False
             return False
             
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         error_msg = "Request timeout - CEO Agent processing took > 60s. Try again in 30 seconds."
         st.session_state.plan_error = error_msg
         st.session_state.analyzing = False
         return False
         
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         error_msg = f"Cannot connect to backend at {BACKEND_URL}"
         st.session_state.plan_error = error_msg
         st.session_state.analyzing = False
         return False
         
-    except requests.exceptions.HTTPError as e:
+    except httpx.HTTPStatusError as e:
         try:
             error_data = e.response.json()
             error_msg = error_data.get("detail", str(e))
@@ -463,6 +669,60 @@ def page_home():
     4. Get strategic plan with deep insights
     """)
 
+@st.fragment
+def _chat_input_fragment():
+    """Chat input form - reruns on its own; a handled submit triggers a full-app rerun"""
+    st.markdown("#### Enter message")
+    with st.form("chat_form", clear_on_submit=True):
+        user_input = st.text_input(
+            "",
+            placeholder="Product, audience, budget...",
+            label_visibility="collapsed"
+        )
+        col1, col2, col3, col4 = st.columns([1.2, 1, 1, 1])
+        
+        with col1:
+            if st.form_submit_button("📤 Send", use_container_width=True, type="primary"):
+                if user_input:
+                    if send_message(user_input):
+                        st.rerun()
+        
+        with col2:
+            if st.form_submit_button("🎯 Demo", use_container_width=True):
+                demo_msg = "I want to market Ashwagandha supplements to health-conscious professionals aged 25-40. Budget is ₹10 lakhs, timeline is 6 weeks, using Instagram and Email channels. Goal is 500 qualified leads."
+                if send_message(demo_msg):
+                    st.rerun()
+        
+        with col3:
+            if st.form_submit_button("⏩ Skip", use_container_width=True):
+                st.session_state.conversation_id = f"demo_{secrets.token_hex(4)}"
+                st.rerun()
+        
+        with col4:
+            if st.form_submit_button("🗑️ Clear", use_container_width=True):
+                st.session_state.messages = []
+                st.session_state.requirements = {k: None for k in REQ_FIELDS}
+                st.session_state.conversation_id = None
+                st.rerun()
+
+def go_to_page(page: str):
+    """Button callback - runs before the sidebar radio that owns st.session_state.page is created"""
+    st.session_state.page = page
+
+def _send_to_ceo():
+    if not st.session_state.conversation_id:
+        st.session_state.conversation_id = f"conv_{secrets.token_hex(4)}"
+    go_to_page("🎯 CEO Analysis")
+
+_PROGRESS_FIELDS = (
+    ("🎯", "product_service", "Product"),
+    ("👥", "target_audience", "Audience"),
+    ("💰", "budget", "Budget"),
+    ("📅", "timeline", "Timeline"),
+    ("📢", "channels", "Channels"),
+    ("🎪", "goals", "Goals")
+)
+
 def page_customer_chat():
     """Customer chat interface for collecting requirements"""
     col_chat, col_progress = st.columns([2.2, 1], gap="medium")
@@ -474,80 +734,25 @@ def page_customer_chat():
         
         with chat_container:
             if not st.session_state.messages:
-                st.markdown("""
-                <div style='text-align: center; padding: 4rem 2rem; color: #64748b;'>
-                    <div style='font-size: 3.5rem;'>💬</div>
-                    <div>Start describing your product, audience, budget...</div>
-                </div>
-                """, unsafe_allow_html=True)
+                st.markdown(_EMPTY_CHAT_HTML, unsafe_allow_html=True)
             else:
-                for msg in st.session_state.messages:
-                    if msg["role"] == "user":
-                        st.markdown(f"""
-                        <div style='display: flex; justify-content: flex-end; margin: 0.8rem 0;'>
-                            <div style='background: linear-gradient(135deg, #3b82f6, #8b5cf6); color: white; 
-                                       padding: 0.9rem 1.2rem; border-radius: 18px 18px 4px 18px; max-width: 75%;'>
-                                {msg['content']}
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    else:
-                        st.markdown(f"""
-                        <div style='display: flex; justify-content: flex-start; margin: 0.8rem 0;'>
-                            <div style='background: rgba(30, 41, 59, 0.7); color: #e8ecf5; 
-                                       padding: 0.9rem 1.2rem; border-radius: 18px 18px 18px 4px; max-width: 75%;'>
-                                {msg['content']}
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
-        
-        # Input form
-        st.markdown("#### Enter message")
-        with st.form("chat_form", clear_on_submit=True):
-            user_input = st.text_input(
-                "",
-                placeholder="Product, audience, budget...",
-                label_visibility="collapsed"
-            )
-            col1, col2, col3, col4 = st.columns([1.2, 1, 1, 1])
-            
-            with col1:
-                if st.form_submit_button("📤 Send", use_container_width=True, type="primary"):
-                    if user_input:
-                        if send_message(user_input):
-                            st.rerun()
-            
-            with col2:
-                if st.form_submit_button("🎯 Demo", use_container_width=True):
-                    demo_msg = "I want to market Ashwagandha supplements to health-conscious professionals aged 25-40. Budget is ₹10 lakhs, timeline is 6 weeks, using Instagram and Email channels. Goal is 500 qualified leads."
-                    if send_message(demo_msg):
-                        st.rerun()
-            
-            with col3:
-                if st.form_submit_button("⏩ Skip", use_container_width=True):
-                    st.session_state.conversation_id = "demo_" + str(random.randint(1000, 9999))
-                    st.rerun()
-            
-            with col4:
-                if st.form_submit_button("🗑️ Clear", use_container_width=True):
-                    st.session_state.messages = []
-                    st.session_state.requirements = {
-                        "product_service": None,
-                        "target_audience": None,
-                        "budget": None,
-                        "timeline": None,
-                        "channels": None,
-                        "goals": None
-                    }
-                    st.session_state.conversation_id = None
-                    st.rerun()
+                # One markdown element per section instead of one per message
+                older = st.session_state.messages[:-CHAT_VISIBLE_MESSAGES]
+                recent = st.session_state.messages[-CHAT_VISIBLE_MESSAGES:]
+                # Collapsed expanders still ship their children - only render older turns on request
+                if older and st.toggle(f"Show earlier messages ({len(older)})", key="_chat_older_opened"):
+                    st.markdown(render_chat_html(older), unsafe_allow_html=True)
+                st.markdown(render_chat_html(recent), unsafe_allow_html=True)
+        
+        # Input form (fragment: empty submits don't re-render the transcript/progress)
+        _chat_input_fragment()
     
     # PROGRESS COLUMN
     with col_progress:
         st.markdown("## 📊 Progress")
         
         # Calculate progress
-        current_progress = calculate_progress_percentage()
+        current_progress, filled = progress_snapshot()
         pct = int(current_progress)
         
         # Display percentage
@@ -565,28 +770,14 @@ def page_customer_chat():
         
         # Fields checklist
         st.markdown("### Status")
-        fields = [
-            ("🎯", "product_service", "Product"),
-            ("👥", "target_audience", "Audience"),
-            ("💰", "budget", "Budget"),
-            ("📅", "timeline", "Timeline"),
-            ("📢", "channels", "Channels"),
-            ("🎪", "goals", "Goals")
-        ]
-        
-        for emoji, key, label in fields:
-            is_filled = check_field_filled(key)
-            status = "✅" if is_filled else "⏳"
+        for emoji, key, label in _PROGRESS_FIELDS:
+            status = "✅" if filled[key] else "⏳"
             st.markdown(f"<div class='progress-item'>{emoji} {label}: {status}</div>", unsafe_allow_html=True)
         
         st.markdown("---")
         
         # SEND TO CEO BUTTON
-        if st.button("🚀 Send to CEO", use_container_width=True, type="primary"):
-            if not st.session_state.conversation_id:
-                st.session_state.conversation_id = "conv_" + str(random.randint(10000, 99999))
-            st.session_state.page = "🎯 CEO Analysis"
-            st.rerun()
+        st.button("🚀 Send to CEO", use_container_width=True, type="primary", on_click=_send_to_ceo)
         
         st.caption("💡 Sends full conversation for analysis")
 
@@ -597,11 +788,12 @@ def page_ceo_analysis():
     # Show conversation summary
     if st.session_state.messages:
         with st.expander("📝 Conversation History", expanded=False):
-            for msg in st.session_state.messages:
-                if msg["role"] == "user":
-                    st.write(f"**You:** {msg['content']}")
-                else:
-                    st.write(f"**Assistant:** {msg['content']}")
+            # Collapsed expanders still render their children - build the transcript only on request
+            if st.toggle("Show transcript", key="_hist_opened"):
+                st.markdown("\n\n".join(
+                    f"**{'You' if msg['role'] == 'user' else 'Assistant'}:** {msg['content']}"
+                    for msg in st.session_state.messages
+                ))
     
     # Show requirements summary
     product = st.session_state.requirements.get('product_service', 'Your product')
@@ -619,9 +811,7 @@ def page_ceo_analysis():
                     if generate_ceo_plan():
                         st.rerun()
         with col3:
-            if st.button("← Back", use_container_width=True):
-                st.session_state.page = "💬 Customer Chat"
-                st.rerun()
+            st.button("← Back", use_container_width=True, on_click=go_to_page, args=("💬 Customer Chat",))
     
     # ERROR STATE
     if st.session_state.plan_error and not st.session_state.ceo_plan:
@@ -644,16 +834,9 @@ def page_ceo_analysis():
         st.markdown(f"**Strategy:** {plan.get('strategy_summary', 'N/A')}")
         st.markdown(f"**Summary:** {plan.get('executive_summary', 'N/A')}")
         
-        # FIXED: Show conversation insights safely
+        # Insights are normalized to a dict when the plan is stored (see generate_ceo_plan)
         insights = plan.get("conversation_insights", {})
         
-        # Handle case where insights might be a string (convert to dict if needed)
-        if isinstance(insights, str):
-            try:
-                insights = json.loads(insights)
-            except:
-                insights = {}
-        
         if insights and isinstance(insights, dict):
             st.markdown("### 💡 Conversation Insights")
             col1, col2, col3, col4 = st.columns(4)
@@ -672,31 +855,28 @@ def page_ceo_analysis():
         
         # Budget Allocation
         st.markdown("### 💰 Budget Allocation")
-        col1, col2, col3, col4, col5 = st.columns(5)
         budget = plan.get("budget_allocation", {})
-        with col1:
-            st.metric("R&D", f"₹{budget.get('rnd_research', 0):,.0f}")
-        with col2:
-            st.metric("Content", f"₹{budget.get('content_creation', 0):,.0f}")
-        with col3:
-            st.metric("Ads", f"₹{budget.get('ads_paid', 0):,.0f}")
-        with col4:
-            st.metric("Tools", f"₹{budget.get('tools_tech', 0):,.0f}")
-        with col5:
-            st.metric("Total", f"₹{budget.get('total', 0):,.0f}", delta="100%")
+        budget_items = [
+            ("R&D", f"₹{budget.get('rnd_research', 0):,.0f}"),
+            ("Content", f"₹{budget.get('content_creation', 0):,.0f}"),
+            ("Ads", f"₹{budget.get('ads_paid', 0):,.0f}"),
+            ("Tools", f"₹{budget.get('tools_tech', 0):,.0f}"),
+            ("Total", f"₹{budget.get('total', 0):,.0f}", "100%")
+        ]
+        for col, item in zip(st.columns(len(budget_items)), budget_items):
+            col.metric(*item)
         
         # KPI Targets
         st.markdown("### 🎯 KPI Targets")
         kpis = plan.get("kpi_targets", {})
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("Target Leads", f"{kpis.get('leads', 0):,}")
-        with col2:
-            st.metric("Conversion Rate", kpis.get("conversion_rate", "N/A"))
-        with col3:
-            st.metric("Expected ROI", kpis.get("roi_expected", "N/A"))
-        with col4:
-            st.metric("Target CAC", kpis.get("cac_target", "N/A"))
+        kpi_items = [
+            ("Target Leads", f"{kpis.get('leads', 0):,}"),
+            ("Conversion Rate", kpis.get("conversion_rate", "N/A")),
+            ("Expected ROI", kpis.get("roi_expected", "N/A")),
+            ("Target CAC", kpis.get("cac_target", "N/A"))
+        ]
+        for col, item in zip(st.columns(len(kpi_items)), kpi_items):
+            col.metric(*item)
         
         # Phases
         if plan.get("phases"):
@@ -711,11 +891,10 @@ def page_ceo_analysis():
         
         # Download
         st.markdown("---")
-        plan_name = plan.get('project_name', 'plan').replace(' ', '_')
         st.download_button(
             label="📥 Download Plan (JSON)",
-            data=json.dumps(plan, indent=2, ensure_ascii=False),
-            file_name=f"ceo_plan_{plan_name}.json",
+            data=_plan_json(plan),
+            file_name=st.session_state.plan_filename,
             mime="application/json"
         )
         
@@ -759,31 +938,13 @@ def page_rd_research():
         competitor_data = get_competitor_analysis()
         
         st.markdown("#### Competitor Benchmarking")
-        comp_df = pd.DataFrame([
-            {
-                "Competitor": c["name"],
-                "Market Share": c["market_share"],
-                "Price Range": c["price_range"],
-                "Strength": c["strength"],
-                "Weakness": c["weakness"]
-            }
-            for c in competitor_data["competitors"]
-        ])
+        competitors = competitor_data["competitors"]
+        comp_df = _build_competitor_df(tuple(c["name"] for c in competitors), competitors)
         st.dataframe(comp_df, use_container_width=True)
     
     with tab3:
         st.markdown("### 📈 Market Trends")
-        trend_data = pd.DataFrame({
-            'Trend': ['E-commerce', 'Subscription Models', 'Personalization', 'Sustainability', 'Direct-to-Consumer'],
-            'Adoption': [78, 52, 65, 58, 71],
-            'Growth Potential': [85, 92, 88, 95, 89]
-        })
-        
-        fig = px.bar(trend_data, x='Trend', y=['Adoption', 'Growth Potential'],
-                     title="Market Trends & Growth Potential",
-                     barmode='group',
-                     labels={'value': 'Score (%)', 'variable': 'Metric'})
-        fig.update_layout(template="plotly_dark", height=400)
+        fig = build_market_trends_fig()
         st.plotly_chart(fig, use_container_width=True)
 
 def page_marketing():
@@ -801,35 +962,30 @@ def page_marketing():
         if leads:
             col1, col2, col3, col4 = st.columns(4)
             
-            email_leads = [l for l in leads if l.get("channel") == "Email"]
-            linkedin_leads = [l for l in leads if l.get("channel") == "LinkedIn"]
-            avg_score = sum([l.get("interest_score", 0) for l in leads]) / len(leads) if leads else 0
+            # One pass for channel counts + score total
+            n_email = n_linkedin = score_sum = 0
+            for l in leads:
+                channel = l.get("channel")
+                if channel == "Email":
+                    n_email += 1
+                elif channel == "LinkedIn":
+                    n_linkedin += 1
+                score_sum += l.get("interest_score", 0)
+            avg_score = score_sum / len(leads)
             
             with col1:
                 st.metric("Total Leads", len(leads), f"+{len(leads)} this week")
             with col2:
-                st.metric("Email Leads", len(email_leads), f"{round(len(email_leads)/len(leads)*100)}%")
+                st.metric("Email Leads", n_email, f"{round(n_email/len(leads)*100)}%")
             with col3:
-                st.metric("LinkedIn Leads", len(linkedin_leads), f"{round(len(linkedin_leads)/len(leads)*100)}%")
+                st.metric("LinkedIn Leads", n_linkedin, f"{round(n_linkedin/len(leads)*100)}%")
             with col4:
                 st.metric("Avg Interest Score", f"{avg_score:.1f}/10", "High engagement")
             
             st.markdown("---")
             
             st.markdown("### Lead Database")
-            leads_display = pd.DataFrame([
-                {
-                    "Name": l.get("name"),
-                    "Email": l.get("email"),
-                    "Company": l.get("company"),
-                    "Position": l.get("position"),
-                    "Channel": l.get("channel"),
-                    "Interest Score": f"{l.get('interest_score', 0)}/10",
-                    "Status": l.get("status"),
-                    "Date": l.get("date_collected")
-                }
-                for l in leads
-            ])
+            leads_display = _build_leads_df(tuple(l.get("email") for l in leads), leads)
             
             st.dataframe(leads_display, use_container_width=True, hide_index=True)
     
@@ -860,23 +1016,22 @@ def page_marketing():
             if st.button("🔗 Send LinkedIn Message", use_container_width=True):
                 st.success("✅ LinkedIn outreach queued - n8n workflow triggered")
 
+_DASHBOARD_KPIS = (
+    ("Total Impressions", "425K", "+12.5%"),
+    ("Total Clicks", "12.3K", "+8.2%"),
+    ("Conversions", "523", "+15.3%"),
+    ("Total Leads", "387", "+10.8%"),
+    ("Avg. ROI", "3.2x", "+5.1%")
+)
+
 def page_dashboard():
     """Analytics dashboard"""
     st.header("📊 Dashboard")
     st.write("Real-time analytics and performance tracking for your marketing campaigns.")
     
     st.markdown("### 📈 Key Performance Indicators")
-    col1, col2, col3, col4, col5 = st.columns(5)
-    with col1:
-        st.metric("Total Impressions", "425K", "+12.5%")
-    with col2:
-        st.metric("Total Clicks", "12.3K", "+8.2%")
-    with col3:
-        st.metric("Conversions", "523", "+15.3%")
-    with col4:
-        st.metric("Total Leads", "387", "+10.8%")
-    with col5:
-        st.metric("Avg. ROI", "3.2x", "+5.1%")
+    for col, item in zip(st.columns(len(_DASHBOARD_KPIS)), _DASHBOARD_KPIS):
+        col.metric(*item)
     
     st.markdown("---")
     
@@ -888,29 +1043,11 @@ def page_dashboard():
         
         col1, col2 = st.columns(2)
         with col1:
-            fig_impressions = go.Figure()
-            fig_impressions.add_trace(go.Scatter(
-                x=campaign_data['Date'],
-                y=campaign_data['Impressions'],
-                mode='lines+markers',
-                name='Impressions',
-                line=dict(color='#3b82f6', width=3),
-                fill='tozeroy'
-            ))
-            fig_impressions.update_layout(title="Impressions Trend", template="plotly_dark", height=350)
+            fig_impressions = build_trend_fig(campaign_data, 'Impressions', '#3b82f6', "Impressions Trend")
             st.plotly_chart(fig_impressions, use_container_width=True)
         
         with col2:
-            fig_clicks = go.Figure()
-            fig_clicks.add_trace(go.Scatter(
-                x=campaign_data['Date'],
-                y=campaign_data['Clicks'],
-                mode='lines+markers',
-                name='Clicks',
-                line=dict(color='#8b5cf6', width=3),
-                fill='tozeroy'
-            ))
-            fig_clicks.update_layout(title="Clicks Trend", template="plotly_dark", height=350)
+            fig_clicks = build_trend_fig(campaign_data, 'Clicks', '#8b5cf6', "Clicks Trend")
             st.plotly_chart(fig_clicks, use_container_width=True)
     
     with tab2:
@@ -920,13 +1057,11 @@ def page_dashboard():
         col1, col2 = st.columns(2)
         
         with col1:
-            fig_reach = px.bar(channel_data, x='Channel', y='Reach', title="Reach by Channel")
-            fig_reach.update_layout(template="plotly_dark", height=350)
+            fig_reach = build_channel_fig(channel_data, 'Reach', "Reach by Channel")
             st.plotly_chart(fig_reach, use_container_width=True)
         
         with col2:
-            fig_engagement = px.bar(channel_data, x='Channel', y='Engagement_Rate', title="Engagement Rate by Channel")
-            fig_engagement.update_layout(template="plotly_dark", height=350)
+            fig_engagement = build_channel_fig(channel_data, 'Engagement_Rate', "Engagement Rate by Channel")
             st.plotly_chart(fig_engagement, use_container_width=True)
     
     with tab3:
@@ -936,9 +1071,7 @@ def page_dashboard():
         col1, col2 = st.columns(2)
         
         with col1:
-            age_df = pd.DataFrame(list(audience_data['age_groups'].items()), columns=['Age Group', 'Percentage'])
-            fig_age = px.pie(age_df, values='Percentage', names='Age Group', title="Audience by Age Group")
-            fig_age.update_layout(template="plotly_dark", height=350)
+            fig_age = build_age_fig(tuple(audience_data['age_groups'].items()))
             st.plotly_chart(fig_age, use_container_width=True)
     
     with tab4:
@@ -962,29 +1095,29 @@ def page_dashboard():
 # ========================
 # SIDEBAR NAVIGATION
 # ========================
+_SIDEBAR_HEADER_HTML = """
+<div style='background: linear-gradient(135deg, #3b82f6, #8b5cf6); padding: 1.5rem; border-radius: 14px; text-align: center; color: white; margin-bottom: 1.5rem;'>
+    <div style='font-size: 1.8rem; font-weight: 800;'>⚡ Automate.io</div>
+    <div style='font-size: 0.8rem;'>Marketing Intelligence Platform</div>
+</div>
+"""
+
+_NAVIGATION_PAGES = (
+    "🏠 Home",
+    "💬 Customer Chat",
+    "🎯 CEO Analysis",
+    "🔬 R&D Research",
+    "📢 Marketing",
+    "📊 Dashboard"
+)
+
 with st.sidebar:
-    st.markdown("""
-    <div style='background: linear-gradient(135deg, #3b82f6, #8b5cf6); padding: 1.5rem; border-radius: 14px; text-align: center; color: white; margin-bottom: 1.5rem;'>
-        <div style='font-size: 1.8rem; font-weight: 800;'>⚡ Automate.io</div>
-        <div style='font-size: 0.8rem;'>Marketing Intelligence Platform</div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_SIDEBAR_HEADER_HTML, unsafe_allow_html=True)
     
     st.markdown("---")
     
-    navigation_pages = [
-        "🏠 Home",
-        "💬 Customer Chat",
-        "🎯 CEO Analysis",
-        "🔬 R&D Research",
-        "📢 Marketing",
-        "📊 Dashboard"
-    ]
-    
-    for nav_page in navigation_pages:
-        if st.button(nav_page, use_container_width=True, key=f"nav_{nav_page}"):
-            st.session_state.page = nav_page
-            st.rerun()
+    # One widget instead of a button per page, bound to st.session_state.page
+    st.radio("Navigate", _NAVIGATION_PAGES, key="page", label_visibility="collapsed")
     
     st.markdown("---")
     st.markdown(f"**🖥️ Backend URL:** `{BACKEND_URL}`")
@@ -996,19 +1129,18 @@ with st.sidebar:
 # ========================
 # MAIN APP ROUTING
 # ========================
+_PAGE_ROUTES = {
+    "🏠 Home": page_home,
+    "💬 Customer Chat": page_customer_chat,
+    "🎯 CEO Analysis": page_ceo_analysis,
+    "🔬 R&D Research": page_rd_research,
+    "📢 Marketing": page_marketing,
+    "📊 Dashboard": page_dashboard
+}
+
 def main():
     """Main application router"""
-    page_routes = {
-        "🏠 Home": page_home,
-        "💬 Customer Chat": page_customer_chat,
-        "🎯 CEO Analysis": page_ceo_analysis,
-        "🔬 R&D Research": page_rd_research,
-        "📢 Marketing": page_marketing,
-        "📊 Dashboard": page_dashboard
-    }
-    
-    page_func = page_routes.get(st.session_state.page, page_home)
-    page_func()
+    _PAGE_ROUTES.get(st.session_state.page, page_home)()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+pytest.importorskip("langchain_groq")
+pytest.importorskip("fastapi")
+os.environ.setdefault("GROQ_API_KEY", "test-key")  # the module builds its ChatGroq clients at import
+
+from Backend.agents.Ceo import safe_float
+
+
+@pytest.mark.parametrize("value, expected", [
+    (50000, 50000.0),
+    ("1,50,000", 150000.0),
+    ("₹ 2.5 lakh", 250000.0),
+    ("5 lakhs", 500000.0),
+    ("3 lkhs", 300000.0),
+    ("2 crores", 20000000.0),
+    ("1.5cr", 15000000.0),
+    ("4 crs", 40000000.0),
+])
+def test_parses_amounts_and_units(value, expected):
+    assert safe_float(value) == expected
+
+
+@pytest.mark.parametrize("value", ["5s", "abc", "", None, "10 dollars"])
+def test_unparseable_values_fall_back_to_default(value):
+    assert safe_float(value) == 100000.0
+    assert safe_float(value, default=42) == 42.0